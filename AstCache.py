@@ -0,0 +1,104 @@
+from dataclasses import fields
+from typing import List, Optional, Sequence
+import hashlib
+import os
+import pickle
+import struct
+import Expr
+import Stmt
+
+
+MAGIC = b'LOXC'
+
+# Bump when the meaning of a cached tree changes without its shape
+# changing, e.g. the Resolver's annotations or an optimization pass.
+VERSION = 3
+
+
+def ast_fingerprint() -> bytes:
+    """
+    Hash of every node class's name and field names, so regenerating the
+    AST with different fields invalidates existing cache files on its own.
+    """
+    digest = hashlib.sha256()
+    for module in (Expr, Stmt):
+        base = getattr(module, module.__name__)
+        for node in base.__subclasses__():
+            digest.update(node.__qualname__.encode())
+            for field in fields(node):
+                digest.update(b' ' + field.name.encode())
+            digest.update(b'\n')
+    return digest.digest()[:8]
+
+
+# magic, format version, AST fingerprint, sha256 of the source,
+# length of the pass list that follows the header
+HEADER = struct.Struct('<4sH8s32sH')
+
+
+class AstCache:
+    """
+    Cache of optimized and resolved programs, one `.loxc` file per script,
+    analogous to CPython's `.pyc` files.
+
+    An entry is only used if the magic, format version, AST fingerprint,
+    SHA-256 of the script's source and the enabled optimization passes all
+    match what this run would have produced; anything else is a miss and
+    the entry is rewritten. Files go in a `__loxcache__` directory next to
+    the script, or under `directory` (mirroring the script's absolute path)
+    when one is given. Failing to read or write the cache is never an error.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.fingerprint = ast_fingerprint()
+
+    def path_for(self, script: str) -> str:
+        script = os.path.abspath(script)
+        folder, name = os.path.split(script)
+        if self.directory is None:
+            folder = os.path.join(folder, '__loxcache__')
+        else:
+            drive, folder = os.path.splitdrive(folder)
+            folder = os.path.join(self.directory, folder.lstrip(os.sep))
+        return os.path.join(folder, os.path.splitext(name)[0] + '.loxc')
+
+    def header(self, source: str, passes: Sequence[str]) -> bytes:
+        names = ','.join(passes).encode()
+        return HEADER.pack(MAGIC, VERSION, self.fingerprint,
+                           hashlib.sha256(source.encode()).digest(),
+                           len(names)) + names
+
+    def load(self, script: str, source: str, passes: Sequence[str]) -> Optional[List[Stmt.Stmt]]:
+        """The cached program for `source`, or None on a miss."""
+        header = self.header(source, passes)
+        try:
+            with open(self.path_for(script), 'rb') as f:
+                if f.read(len(header)) != header:
+                    return None
+                return pickle.load(f)
+        except Exception:
+            # Missing, unreadable or corrupt; recompile either way.
+            return None
+
+    def store(self, script: str, source: str, passes: Sequence[str],
+              statements: List[Stmt.Stmt]) -> None:
+        try:
+            payload = pickle.dumps(statements, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError):
+            return
+
+        path = self.path_for(script)
+        temp = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp, 'wb') as f:
+                f.write(self.header(source, passes))
+                f.write(payload)
+            # Readers see either the old file or the complete new one.
+            os.replace(temp, path)
+        except OSError:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
@@ -0,0 +1,74 @@
+from array import array
+from enum import IntEnum, auto
+from typing import List
+
+
+class OpCode(IntEnum):
+    CONSTANT = auto()       # const index
+    NIL = auto()
+    TRUE = auto()
+    FALSE = auto()
+    POP = auto()
+
+    GET_LOCAL = auto()      # depth, slot
+    SET_LOCAL = auto()      # depth, slot
+    DEFINE_LOCAL = auto()
+    GET_GLOBAL = auto()     # name const index
+    SET_GLOBAL = auto()     # name const index
+    DEFINE_GLOBAL = auto()  # name const index
+
+    EQUAL = auto()
+    NOT_EQUAL = auto()
+    GREATER = auto()
+    GREATER_EQUAL = auto()
+    LESS = auto()
+    LESS_EQUAL = auto()
+    ADD = auto()
+    SUBTRACT = auto()
+    MULTIPLY = auto()
+    DIVIDE = auto()
+    NOT = auto()
+    NEGATE = auto()
+
+    PRINT = auto()
+    JUMP = auto()           # target
+    JUMP_IF_FALSE = auto()  # target, leaves the condition on the stack
+    LOOP = auto()           # target
+
+    PUSH_ENV = auto()
+    POP_ENV = auto()
+    FUNCTION = auto()       # prototype const index
+    CALL = auto()           # arg count, paren token const index
+    RETURN = auto()
+
+
+class Chunk:
+    """
+    A compiled sequence of instructions. Opcodes and their operands are
+    stored as flat words in `code`, with the source line of every word kept
+    in the parallel `lines` array.
+    """
+
+    def __init__(self):
+        self.code = array('i')
+        self.lines = array('i')
+        self.constants: List[object] = []
+
+    def write(self, word: int, line: int) -> int:
+        """Append a word and return its offset."""
+        self.code.append(word)
+        self.lines.append(line)
+        return len(self.code) - 1
+
+    def add_constant(self, value: object) -> int:
+        self.constants.append(value)
+        return len(self.constants) - 1
+
+
+class FunctionProto:
+    """The compiled, environment-independent part of a Lox function."""
+
+    def __init__(self, name: str, arity: int, chunk: Chunk):
+        self.name = name
+        self.arity = arity
+        self.chunk = chunk
@@ -0,0 +1,305 @@
+from typing import Callable, List
+from Environment import Environment
+from ErrorReporter import nesting_error
+import Expr
+from Interpreter import Interpreter
+from LoxCallable import LoxCallable
+from Numbers import to_float
+from Return import Return
+import Stmt
+from TokenType import TokenType
+
+
+# A compiled node: takes the current environment and returns the node's
+# value (statements return None).
+Code = Callable[[object], object]
+
+
+class ClosureFunction(LoxCallable):
+    def __init__(self, name: str, arity: int, body: Code, closure):
+        self.name = name
+        self._arity = arity
+        self.body = body
+        self.closure = closure
+
+    def call(self, interpreter: Interpreter, arguments: List[object]) -> object:
+        try:
+            self.body(Environment(enclosing=self.closure, values=arguments))
+        except Return as returnValue:
+            return returnValue.value
+
+    def arity(self) -> int:
+        return self._arity
+
+    def toString(self) -> str:
+        return f"<fn {self.name}>"
+
+
+class ClosureCompiler(Expr.Visitor[Code], Stmt.Visitor[Code]):
+    """
+    Turns each AST node into a Python closure once, ahead of execution.
+    Operators and variable addressing are decided here, so running a
+    closure does no visitor dispatch or operator matching.
+    """
+
+    def __init__(self, interpreter: Interpreter):
+        self.interpreter = interpreter
+        self.scope_depth = 0  # 0 means we are declaring globals
+
+    def compile(self, statements: List[Stmt.Stmt]) -> Code:
+        return self.sequence([stmt.accept(self) for stmt in statements])
+
+    def sequence(self, codes: List[Code]) -> Code:
+        if len(codes) == 1:
+            return codes[0]
+
+        def run(env):
+            for code in codes:
+                code(env)
+        return run
+
+    def define(self, name: str, value: Code) -> Code:
+        if self.scope_depth == 0:
+            globals = self.interpreter.globals.values
+
+            def define_global(env):
+                globals[name] = value(env)
+            return define_global
+
+        def define_local(env):
+            env.values.append(value(env))
+        return define_local
+
+    def visit_block_stmt(self, stmt: Stmt.Block) -> Code:
+        self.scope_depth += 1
+        body = self.compile(stmt.statements)
+        self.scope_depth -= 1
+
+        def block(env):
+            body(Environment(enclosing=env))
+        return block
+
+    def visit_expression_stmt(self, stmt: Stmt.Expression) -> Code:
+        return stmt.expression.accept(self)
+
+    def visit_function_stmt(self, stmt: Stmt.Function) -> Code:
+        self.scope_depth += 1
+        body = self.compile(stmt.body)
+        self.scope_depth -= 1
+        name = stmt.name.lexeme
+        arity = len(stmt.params)
+
+        def function(env):
+            return ClosureFunction(name, arity, body, env)
+        return self.define(name, function)
+
+    def visit_if_stmt(self, stmt: Stmt.If) -> Code:
+        condition = stmt.condition.accept(self)
+        then_branch = stmt.thenBranch.accept(self)
+        if stmt.elseBranch is None:
+            def if_then(env):
+                value = condition(env)
+                if value is not None and value is not False:
+                    then_branch(env)
+            return if_then
+
+        else_branch = stmt.elseBranch.accept(self)
+
+        def if_then_else(env):
+            value = condition(env)
+            if value is not None and value is not False:
+                then_branch(env)
+            else:
+                else_branch(env)
+        return if_then_else
+
+    def visit_print_stmt(self, stmt: Stmt.Print) -> Code:
+        value = stmt.expresssion.accept(self)
+        stringify = self.interpreter.stringify
+        write_line = self.interpreter.output.write_line
+
+        def print_stmt(env):
+            write_line(stringify(value(env)))
+        return print_stmt
+
+    def visit_return_stmt(self, stmt: Stmt.Return) -> Code:
+        if stmt.value is None:
+            def return_nil(env):
+                raise Return(None)
+            return return_nil
+
+        value = stmt.value.accept(self)
+
+        def return_value(env):
+            raise Return(value(env))
+        return return_value
+
+    def visit_var_stmt(self, stmt: Stmt.Var) -> Code:
+        if stmt.initializer is None:
+            return self.define(stmt.name.lexeme, lambda env: None)
+        return self.define(stmt.name.lexeme, stmt.initializer.accept(self))
+
+    def visit_while_stmt(self, stmt: Stmt.While) -> Code:
+        condition = stmt.condition.accept(self)
+        body = stmt.body.accept(self)
+
+        def while_stmt(env):
+            while True:
+                value = condition(env)
+                if value is None or value is False:
+                    return
+                body(env)
+        return while_stmt
+
+    def visit_assign_expr(self, expr: Expr.Assign) -> Code:
+        value = expr.value.accept(self)
+        slot = expr.slot
+
+        if expr.depth < 0:
+            assign = self.interpreter.globals.assign
+            name = expr.name
+
+            def assign_global(env):
+                result = value(env)
+                assign(name, result)
+                return result
+            return assign_global
+
+        if expr.depth == 0:
+            def assign_local(env):
+                result = env.values[slot] = value(env)
+                return result
+            return assign_local
+
+        depth = expr.depth
+
+        def assign_enclosing(env):
+            result = env.ancestor(depth).values[slot] = value(env)
+            return result
+        return assign_enclosing
+
+    def visit_binary_expr(self, expr: Expr.Binary) -> Code:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+
+        match expr.operator.type:
+            case TokenType.MINUS:
+                return lambda env: left(env) - right(env)
+            case TokenType.SLASH:
+                return lambda env: left(env) / right(env)
+            case TokenType.STAR:
+                return lambda env: left(env) * right(env)
+            case TokenType.PLUS:
+                return lambda env: left(env) + right(env)
+
+            case TokenType.GREATER:
+                return lambda env: left(env) > right(env)
+            case TokenType.GREATER_EQUAL:
+                return lambda env: left(env) >= right(env)
+            case TokenType.LESS:
+                return lambda env: left(env) < right(env)
+            case TokenType.LESS_EQUAL:
+                return lambda env: left(env) <= right(env)
+
+            case TokenType.BANG_EQUAL:
+                return lambda env: not left(env) == right(env)
+            case TokenType.EQUAL_EQUAL:
+                return lambda env: left(env) == right(env)
+
+        return lambda env: None
+
+    def visit_call_expr(self, expr: Expr.Call) -> Code:
+        callee = expr.callee.accept(self)
+        arguments = [argument.accept(self) for argument in expr.arguments]
+        paren = expr.paren
+        interpreter = self.interpreter
+
+        def call(env):
+            func = callee(env)
+            values = [argument(env) for argument in arguments]
+
+            if not isinstance(func, LoxCallable):
+                raise RuntimeError(
+                    paren, "Can only call functions and classes.")
+
+            if len(values) != func.arity():
+                raise RuntimeError(
+                    paren, f"Expected {func.arity()} arguments but got {len(values)}.")
+
+            return func.call(interpreter, values)
+        return call
+
+    def visit_grouping_expr(self, expr: Expr.Grouping) -> Code:
+        return expr.expression.accept(self)
+
+    def visit_literal_expr(self, expr: Expr.Literal) -> Code:
+        value = to_float(expr.value)
+        return lambda env: value
+
+    def visit_logical_expr(self, expr: Expr.Logical) -> Code:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+
+        if expr.operator.type == TokenType.OR:
+            def logical_or(env):
+                value = left(env)
+                if value is not None and value is not False:
+                    return value
+                return right(env)
+            return logical_or
+
+        def logical_and(env):
+            value = left(env)
+            if value is None or value is False:
+                return value
+            return right(env)
+        return logical_and
+
+    def visit_unary_expr(self, expr: Expr.Unary) -> Code:
+        right = expr.right.accept(self)
+
+        match expr.operator.type:
+            case TokenType.MINUS:
+                return lambda env: -right(env)
+            case TokenType.BANG:
+                def logical_not(env):
+                    value = right(env)
+                    return value is None or value is False
+                return logical_not
+
+        return lambda env: None
+
+    def visit_variable_expr(self, expr: Expr.Variable) -> Code:
+        slot = expr.slot
+
+        if expr.depth < 0:
+            get = self.interpreter.globals.get
+            name = expr.name
+            return lambda env: get(name)
+
+        if expr.depth == 0:
+            return lambda env: env.values[slot]
+        if expr.depth == 1:
+            return lambda env: env.enclosing.values[slot]
+
+        depth = expr.depth
+        return lambda env: env.ancestor(depth).values[slot]
+
+
+class ClosureInterpreter(Interpreter):
+    """Runs programs compiled to closures by ClosureCompiler."""
+
+    def interpret(self, statements: List[Stmt.Stmt]) -> None:
+        try:
+            program = ClosureCompiler(self).compile(statements)
+        except RecursionError:
+            nesting_error(statements)
+            return
+        try:
+            program(self.globals)
+        except RecursionError:
+            self.runtime_error(RuntimeError("Stack overflow."))
+        except Exception as e:
+            self.runtime_error(e)
+        finally:
+            self.output.flush()
@@ -0,0 +1,206 @@
+from typing import List
+from Chunk import Chunk, FunctionProto, OpCode
+from Numbers import to_float
+import Expr
+import Stmt
+from TokenType import TokenType
+
+
+BINARY_OPS = {
+    TokenType.MINUS: OpCode.SUBTRACT,
+    TokenType.SLASH: OpCode.DIVIDE,
+    TokenType.STAR: OpCode.MULTIPLY,
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.GREATER: OpCode.GREATER,
+    TokenType.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    TokenType.LESS: OpCode.LESS,
+    TokenType.LESS_EQUAL: OpCode.LESS_EQUAL,
+    TokenType.BANG_EQUAL: OpCode.NOT_EQUAL,
+    TokenType.EQUAL_EQUAL: OpCode.EQUAL,
+}
+
+
+class Compiler(Expr.Visitor[None], Stmt.Visitor[None]):
+    """
+    Compiles a resolved AST into bytecode for the VM. Variables keep the
+    (depth, slot) addressing worked out by the Resolver, and blocks push
+    and pop environments exactly where the tree-walker creates them.
+    """
+
+    def __init__(self):
+        self.chunk = Chunk()
+        self.scope_depth = 0  # 0 means we are declaring globals
+        self.line = 1
+
+    def compile(self, statements: List[Stmt.Stmt]) -> Chunk:
+        for statement in statements:
+            self.compile_stmt(statement)
+        self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+        return self.chunk
+
+    def compile_stmt(self, stmt: Stmt.Stmt) -> None:
+        stmt.accept(self)
+
+    def compile_expr(self, expr: Expr.Expr) -> None:
+        expr.accept(self)
+
+    def emit(self, *words: int) -> int:
+        for word in words:
+            offset = self.chunk.write(word, self.line)
+        return offset
+
+    def emit_constant(self, value: object) -> None:
+        self.emit(OpCode.CONSTANT, self.chunk.add_constant(value))
+
+    def emit_jump(self, op: OpCode) -> int:
+        """Emit a forward jump with a placeholder target, to be patched."""
+        return self.emit(op, -1)
+
+    def patch_jump(self, offset: int) -> None:
+        self.chunk.code[offset] = len(self.chunk.code)
+
+    def emit_define(self, name: str) -> None:
+        if self.scope_depth == 0:
+            self.emit(OpCode.DEFINE_GLOBAL, self.chunk.add_constant(name))
+        else:
+            self.emit(OpCode.DEFINE_LOCAL)
+
+    def visit_block_stmt(self, stmt: Stmt.Block) -> None:
+        self.emit(OpCode.PUSH_ENV)
+        self.scope_depth += 1
+        for statement in stmt.statements:
+            self.compile_stmt(statement)
+        self.scope_depth -= 1
+        self.emit(OpCode.POP_ENV)
+
+    def visit_expression_stmt(self, stmt: Stmt.Expression) -> None:
+        self.compile_expr(stmt.expression)
+        self.emit(OpCode.POP)
+
+    def visit_function_stmt(self, stmt: Stmt.Function) -> None:
+        self.line = stmt.name.line
+        enclosing_chunk = self.chunk
+        self.chunk = Chunk()
+        self.scope_depth += 1
+        for statement in stmt.body:
+            self.compile_stmt(statement)
+        self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+        self.scope_depth -= 1
+
+        proto = FunctionProto(stmt.name.lexeme, len(stmt.params), self.chunk)
+        self.chunk = enclosing_chunk
+        self.line = stmt.name.line
+        self.emit(OpCode.FUNCTION, self.chunk.add_constant(proto))
+        self.emit_define(stmt.name.lexeme)
+
+    def visit_if_stmt(self, stmt: Stmt.If) -> None:
+        self.compile_expr(stmt.condition)
+        then_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        self.emit(OpCode.POP)
+        self.compile_stmt(stmt.thenBranch)
+        else_jump = self.emit_jump(OpCode.JUMP)
+
+        self.patch_jump(then_jump)
+        self.emit(OpCode.POP)
+        if stmt.elseBranch is not None:
+            self.compile_stmt(stmt.elseBranch)
+        self.patch_jump(else_jump)
+
+    def visit_print_stmt(self, stmt: Stmt.Print) -> None:
+        self.compile_expr(stmt.expresssion)
+        self.emit(OpCode.PRINT)
+
+    def visit_return_stmt(self, stmt: Stmt.Return) -> None:
+        self.line = stmt.keyword.line
+        if stmt.value is not None:
+            self.compile_expr(stmt.value)
+        else:
+            self.emit(OpCode.NIL)
+        self.emit(OpCode.RETURN)
+
+    def visit_var_stmt(self, stmt: Stmt.Var) -> None:
+        self.line = stmt.name.line
+        if stmt.initializer is not None:
+            self.compile_expr(stmt.initializer)
+        else:
+            self.emit(OpCode.NIL)
+        self.emit_define(stmt.name.lexeme)
+
+    def visit_while_stmt(self, stmt: Stmt.While) -> None:
+        loop_start = len(self.chunk.code)
+        self.compile_expr(stmt.condition)
+        exit_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+        self.emit(OpCode.POP)
+        self.compile_stmt(stmt.body)
+        self.emit(OpCode.LOOP, loop_start)
+
+        self.patch_jump(exit_jump)
+        self.emit(OpCode.POP)
+
+    def visit_assign_expr(self, expr: Expr.Assign) -> None:
+        self.compile_expr(expr.value)
+        self.line = expr.name.line
+        if expr.depth < 0:
+            self.emit(OpCode.SET_GLOBAL,
+                      self.chunk.add_constant(expr.name.lexeme))
+        else:
+            self.emit(OpCode.SET_LOCAL, expr.depth, expr.slot)
+
+    def visit_binary_expr(self, expr: Expr.Binary) -> None:
+        self.compile_expr(expr.left)
+        self.compile_expr(expr.right)
+        self.line = expr.operator.line
+        self.emit(BINARY_OPS[expr.operator.type])
+
+    def visit_call_expr(self, expr: Expr.Call) -> None:
+        self.compile_expr(expr.callee)
+        for argument in expr.arguments:
+            self.compile_expr(argument)
+        self.line = expr.paren.line
+        self.emit(OpCode.CALL, len(expr.arguments),
+                  self.chunk.add_constant(expr.paren))
+
+    def visit_grouping_expr(self, expr: Expr.Grouping) -> None:
+        self.compile_expr(expr.expression)
+
+    def visit_literal_expr(self, expr: Expr.Literal) -> None:
+        if expr.value is None:
+            self.emit(OpCode.NIL)
+        elif expr.value is True:
+            self.emit(OpCode.TRUE)
+        elif expr.value is False:
+            self.emit(OpCode.FALSE)
+        else:
+            self.emit_constant(to_float(expr.value))
+
+    def visit_logical_expr(self, expr: Expr.Logical) -> None:
+        self.compile_expr(expr.left)
+        self.line = expr.operator.line
+        if expr.operator.type == TokenType.OR:
+            else_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+            end_jump = self.emit_jump(OpCode.JUMP)
+            self.patch_jump(else_jump)
+        else:
+            end_jump = self.emit_jump(OpCode.JUMP_IF_FALSE)
+
+        self.emit(OpCode.POP)
+        self.compile_expr(expr.right)
+        self.patch_jump(end_jump)
+
+    def visit_unary_expr(self, expr: Expr.Unary) -> None:
+        self.compile_expr(expr.right)
+        self.line = expr.operator.line
+        if expr.operator.type == TokenType.MINUS:
+            self.emit(OpCode.NEGATE)
+        else:
+            self.emit(OpCode.NOT)
+
+    def visit_variable_expr(self, expr: Expr.Variable) -> None:
+        self.line = expr.name.line
+        if expr.depth < 0:
+            self.emit(OpCode.GET_GLOBAL,
+                      self.chunk.add_constant(expr.name.lexeme))
+        else:
+            self.emit(OpCode.GET_LOCAL, expr.depth, expr.slot)
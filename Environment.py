@@ -1,31 +1,70 @@
-from typing import Optional
+from typing import List, Optional
+import itertools
 from Token import Token
 
 
+# Versions are drawn from one counter shared by every GlobalEnvironment,
+# so a node cached under one interpreter never looks valid in another.
+versions = itertools.count(1)
+
+
 class Environment:
-    def __init__(self, enclosing: Optional['Environment'] = None):
-        self.values = {}
+    """
+    A local scope. Variables are stored by slot index, in declaration order,
+    as worked out by the Resolver, so no names are kept at runtime.
+    """
+    __slots__ = ('values', 'enclosing')
+
+    def __init__(self, enclosing: Optional['Environment'] = None,
+                 values: Optional[List[object]] = None):
+        self.values: List[object] = [] if values is None else values
         self.enclosing = enclosing
 
+    def define(self, value: object) -> None:
+        self.values.append(value)
+
+    def ancestor(self, distance: int) -> 'Environment':
+        environment = self
+        for _ in range(distance):
+            environment = environment.enclosing
+        return environment
+
+    def get_at(self, distance: int, slot: int) -> object:
+        return self.ancestor(distance).values[slot]
+
+    def assign_at(self, distance: int, slot: int, value: object) -> None:
+        self.ancestor(distance).values[slot] = value
+
+
+class GlobalEnvironment:
+    """
+    The outermost scope. Globals are late bound (a function may refer to a
+    global declared after it), so they stay keyed by name.
+
+    `version` changes whenever any global is defined or assigned. The
+    tree-walker caches a global's value on the node that read it, tagged
+    with the version at the time, so code that writes `values` directly
+    while LoxFunctions may still run must bump it too.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.version = next(versions)
+
     def define(self, name: str, value: object) -> None:
         self.values[name] = value
+        self.version = next(versions)
 
     def get(self, name: Token) -> object:
         if name.lexeme in self.values:
             return self.values[name.lexeme]
-        
-        if self.enclosing:
-            return self.enclosing.get(name)
 
         raise RuntimeError(f"Undefined variable '{name.lexeme}'.")
 
     def assign(self, name: Token, value: object) -> None:
         if name.lexeme in self.values:
             self.values[name.lexeme] = value
-            return
-        
-        if self.enclosing:
-            self.enclosing.assign(name, value)
+            self.version = next(versions)
             return
 
-        raise RuntimeError(f"Undefined variable '{name.lexeme}'.")
\ No newline at end of file
+        raise RuntimeError(f"Undefined variable '{name.lexeme}'.")
@@ -1,4 +1,6 @@
+from dataclasses import fields, is_dataclass
 import sys
+from typing import List
 
 from Token import Token
 from TokenType import TokenType
@@ -23,6 +25,30 @@ def error_at_token(token: Token, message: str) -> None:
     else:
         report(token.line, " at '" + token.lexeme + "'", message)
 
+def nesting_error(statements: List[object]) -> None:
+    """
+    Report a program too deeply nested for the recursive passes over it,
+    at the first line of its most deeply nested top-level statement.
+    """
+    deepest, line = -1, 0
+    for statement in statements:
+        depth, lines = 0, []
+        stack = [(statement, 0)]
+        while stack:
+            node, level = stack.pop()
+            if isinstance(node, Token):
+                lines.append(node.line)
+            elif isinstance(node, list):
+                stack.extend((item, level) for item in node)
+            elif is_dataclass(node):
+                depth = max(depth, level)
+                stack.extend((getattr(node, field.name), level + 1) for field in fields(node))
+        if depth > deepest:
+            deepest, line = depth, min(lines, default=0)
+    error_at_line(line, "Too much nesting.")
+
+
 def runtime_error(error: RuntimeError):
+    global hadRuntimeError
     print(error)
     hadRuntimeError = True
\ No newline at end of file
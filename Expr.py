@@ -1,11 +1,14 @@
 from dataclasses import dataclass
-from typing import List, Any, TypeVar, Generic
+from typing import List, Any, TypeVar, Generic, Callable, ClassVar
 from abc import ABC, abstractmethod
 from Token import Token
 R = TypeVar('R')
 
 
 class Expr(ABC):
+    __slots__ = ()
+    tag: ClassVar[int]
+
     @abstractmethod
     def accept(self, visitor: 'Visitor[R]') -> R:
         pass
@@ -45,73 +48,106 @@ class Visitor(Generic[R], ABC):
         pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Assign(Expr):
+    tag: ClassVar[int] = 0
     name: Token
     value: Expr
+    depth: int = -1
+    slot: int = -1
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_assign_expr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Binary(Expr):
+    tag: ClassVar[int] = 1
     left: Expr
     operator: Token
     right: Expr
+    hits: int = 0
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_binary_expr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Call(Expr):
+    tag: ClassVar[int] = 2
     callee: Expr
     paren: Token
     arguments: List[Expr]
+    cache: Any = None
+    version: int = -1
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_call_expr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Grouping(Expr):
+    tag: ClassVar[int] = 3
     expression: Expr
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_grouping_expr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Literal(Expr):
+    tag: ClassVar[int] = 4
     value: Any
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_literal_expr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Logical(Expr):
+    tag: ClassVar[int] = 5
     left: Expr
     operator: Token
     right: Expr
+    hits: int = 0
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_logical_expr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Unary(Expr):
+    tag: ClassVar[int] = 6
     operator: Token
     right: Expr
+    hits: int = 0
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_unary_expr(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Variable(Expr):
+    tag: ClassVar[int] = 7
     name: Token
+    depth: int = -1
+    slot: int = -1
+    cache: Any = None
+    version: int = -1
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_variable_expr(self)
+
+
+def dispatch_table(visitor: 'Visitor[R]') -> List[Callable[[Any], R]]:
+    """Bound visit methods of `visitor`, indexed by node tag."""
+    return [
+        visitor.visit_assign_expr,
+        visitor.visit_binary_expr,
+        visitor.visit_call_expr,
+        visitor.visit_grouping_expr,
+        visitor.visit_literal_expr,
+        visitor.visit_logical_expr,
+        visitor.visit_unary_expr,
+        visitor.visit_variable_expr,
+    ]
@@ -1,71 +1,125 @@
 from typing import List
 import os
+import sys
 
 
-def define_ast(output_dir: str, base_name: str, types: List[str]):
+def parse_field(field: str):
+    """
+    Split a field spec such as `Token name` or `int depth = -1` into its
+    type hint, name and optional default value.
+    """
+    default = None
+    if "=" in field:
+        field, default = [part.strip() for part in field.split("=")]
+    type_hint, name = field.split()
+    return type_hint, name, default
+
+
+def define_ast(output_dir: str, base_name: str, types: List[str], compact: bool = False):
+    """
+    Write the `base_name` module. In compact mode nodes are slotted
+    dataclasses (no per-instance __dict__), each class carries an integer
+    `tag`, and the module gets a `dispatch_table` function so a visitor can
+    index its visit methods by tag instead of going through `accept`.
+    """
     path = os.path.join(output_dir, f'{base_name}.py')
 
     with open(path, "w", encoding="utf-8") as f:
         f.write("from dataclasses import dataclass\n")
-        f.write("from typing import List, Any, TypeVar, Generic\n")
+        if compact:
+            f.write(
+                "from typing import List, Any, TypeVar, Generic, Callable, ClassVar\n")
+        else:
+            f.write("from typing import List, Any, TypeVar, Generic\n")
         f.write("from abc import ABC, abstractmethod\n")
         f.write("from Token import Token\n")
         if base_name != "Expr":
             f.write("from Expr import Expr\n\n")
 
-        f.write("R = TypeVar('R')\n\n")
+        f.write("R = TypeVar('R')\n\n\n")
 
         # Base abstract class
         f.write(f"class {base_name}(ABC):\n")
+        if compact:
+            f.write("    __slots__ = ()\n")
+            f.write("    tag: ClassVar[int]\n\n")
         f.write("    @abstractmethod\n")
         f.write(
             "    def accept(self, visitor: 'Visitor[R]') -> R:\n")
-        f.write("        pass\n\n")
+        f.write("        pass\n\n\n")
 
         # Visitor abstract base class
         f.write("class Visitor(Generic[R], ABC):\n")
-        for type_def in types:
+        for i, type_def in enumerate(types):
             class_name = type_def.split(":")[0].strip()
+            if i > 0:
+                f.write("\n")
             f.write(f"    @abstractmethod\n")
             f.write(
                 f"    def visit_{class_name.lower()}_{base_name.lower()}(self, {base_name.lower()}: '")
             f.write(f"{class_name}') -> R:\n")
             f.write("        pass\n")
-        f.write("\n")
 
         # Expression subclasses
-        for type_def in types:
+        for tag, type_def in enumerate(types):
             class_name, fields = [part.strip() for part in type_def.split(":")]
-            f.write("@dataclass\n")
-            f.write(f"class {class_name}({base_name}):\n")
+            f.write("\n\n")
+            if compact:
+                f.write("@dataclass(slots=True)\n")
+                f.write(f"class {class_name}({base_name}):\n")
+                f.write(f"    tag: ClassVar[int] = {tag}\n")
+            else:
+                f.write("@dataclass\n")
+                f.write(f"class {class_name}({base_name}):\n")
 
             fields = [field.strip() for field in fields.split(",")]
             for field in fields:
-                type_hint, name = field.split()
-                f.write(f"    {name}: {type_hint}\n")
+                type_hint, name, default = parse_field(field)
+                if default is None:
+                    f.write(f"    {name}: {type_hint}\n")
+                else:
+                    f.write(f"    {name}: {type_hint} = {default}\n")
 
             f.write("\n")
             f.write(
                 "    def accept(self, visitor: 'Visitor[R]') -> R:\n")
             f.write(
-                f"        return visitor.visit_{class_name.lower()}_{base_name.lower()}(self)\n\n")
+                f"        return visitor.visit_{class_name.lower()}_{base_name.lower()}(self)\n")
+
+        if compact:
+            f.write("\n\n")
+            f.write(
+                "def dispatch_table(visitor: 'Visitor[R]') -> List[Callable[[Any], R]]:\n")
+            f.write('    """Bound visit methods of `visitor`, indexed by node tag."""\n')
+            f.write("    return [\n")
+            for type_def in types:
+                class_name = type_def.split(":")[0].strip()
+                f.write(
+                    f"        visitor.visit_{class_name.lower()}_{base_name.lower()},\n")
+            f.write("    ]\n")
 
 
 def main():
     output_dir = './'
+    compact = "--plain" not in sys.argv
     define_ast(
         output_dir,
         "Expr",
         [
-            "Assign: Token name, Expr value",
-            "Binary   : Expr left, Token operator, Expr right",
-            "Call: Expr callee, Token paren, List[Expr] arguments",
+            # depth/slot are filled in by the Resolver; -1 means global
+            "Assign: Token name, Expr value, int depth = -1, int slot = -1",
+            # hits: runs before the tree-walker specializes the node
+            "Binary   : Expr left, Token operator, Expr right, int hits = 0",
+            # cache/version: the tree-walker's inline cache for globals,
+            # valid while version matches GlobalEnvironment.version
+            "Call: Expr callee, Token paren, List[Expr] arguments, Any cache = None, int version = -1",
             "Grouping : Expr expression",
             "Literal  : Any value",
-            "Logical: Expr left, Token operator, Expr right",
-            "Unary    : Token operator, Expr right",
-            "Variable: Token name"
-        ]
+            "Logical: Expr left, Token operator, Expr right, int hits = 0",
+            "Unary    : Token operator, Expr right, int hits = 0",
+            "Variable: Token name, int depth = -1, int slot = -1, Any cache = None, int version = -1"
+        ],
+        compact
     )
 
     define_ast(
@@ -80,7 +134,8 @@ def main():
             "Return: Token keyword, Expr value",
             "Var: Token name, Expr initializer",
             "While: Expr condition, Stmt body"
-        ]
+        ],
+        compact
     )
 
 
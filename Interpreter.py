@@ -1,20 +1,26 @@
 from Clock import Clock
-from Return import Return
-from typing import List
-from Environment import Environment
+from Return import RETURNING
+from typing import List, Optional, Tuple
+from Environment import Environment, GlobalEnvironment
 from ErrorReporter import runtime_error
 import Expr
 import Stmt
 from TokenType import TokenType
-from LoxFunction import LoxFunction
+from LoxFunction import LoxFunction, TailCall
 from LoxCallable import LoxCallable
+from Output import Sink, StreamSink
+from Numbers import MAX_EXACT, add, multiply, negate, subtract, to_float
+from Quickening import (QUICKEN_AFTER, OPERATORS, deoptimize, quicken_binary,
+                        quicken_logical, quicken_unary)
 
 
 class Interpreter(Expr.Visitor[object], Stmt.Visitor[object]):
-    def __init__(self):
+    def __init__(self, output: Optional[Sink] = None):
         super().__init__()
-        self.globals = Environment()  # track the global env
+        self.output = StreamSink() if output is None else output
+        self.globals = GlobalEnvironment()  # track the global env
         self.environment = self.globals  # track the current env
+        self.return_value: object = None  # set when a statement returns RETURNING
         self.globals.define('clock', Clock())
 
     def interpret(self, statements: List[Stmt.Stmt]) -> None:
@@ -22,13 +28,28 @@ class Interpreter(Expr.Visitor[object], Stmt.Visitor[object]):
             for statement in statements:
                 self.execute(statement)
 
+        except RecursionError:
+            # Lox calls and nesting recurse in Python here; use the vm
+            # backend for programs that need to go deeper.
+            self.runtime_error(RuntimeError("Stack overflow."))
         except Exception as e:
-            runtime_error(e)
+            self.runtime_error(e)
+        finally:
+            self.output.flush()
+
+    def runtime_error(self, error: Exception) -> None:
+        """Report a runtime error, after the output printed before it."""
+        self.output.flush()
+        runtime_error(error)
 
     def visit_literal_expr(self, expr: Expr.Literal) -> object:
         return expr.value
 
     def visit_logical_expr(self, expr: Expr.Logical) -> object:
+        expr.hits += 1
+        if expr.hits == QUICKEN_AFTER:
+            quicken_logical(expr)
+
         left = self.evaluate(expr.left)
         if expr.operator.type == TokenType.OR:
             if self.is_truthy(left):
@@ -47,64 +68,204 @@ class Interpreter(Expr.Visitor[object], Stmt.Visitor[object]):
 
     def visit_unary_expr(self, expr: Expr.Unary) -> object:
         right = self.evaluate(expr.right)
+        expr.hits += 1
+        if expr.hits == QUICKEN_AFTER:
+            quicken_unary(expr, right)
+
         match expr.operator.type:
             case TokenType.MINUS:
-                return -right
+                return negate(right)
             case TokenType.BANG:
                 return not self.is_truthy(right)
 
         return None
 
-    def visit_variable_expr(self, expr) -> object:
-        return self.environment.get(expr.name)
+    def visit_variable_expr(self, expr: Expr.Variable) -> object:
+        if expr.depth < 0:
+            globals = self.globals
+            if expr.version == globals.version:
+                return expr.cache
+            try:
+                value = globals.values[expr.name.lexeme]
+            except KeyError:
+                value = globals.get(expr.name)  # raises the Lox error
+            expr.cache = value
+            expr.version = globals.version
+            return value
+        return self.environment.get_at(expr.depth, expr.slot)
 
     def visit_binary_expr(self, expr: Expr.Binary) -> object:
         left = self.evaluate(expr.left)
         right = self.evaluate(expr.right)
+        expr.hits += 1
+        if expr.hits == QUICKEN_AFTER:
+            quicken_binary(expr, left, right)
 
-        match expr.operator.type:
-            case TokenType.MINUS:
-                return left - right
-            case TokenType.SLASH:
-                return left / right
-            case TokenType.STAR:
-                return left * right
-            case TokenType.PLUS:
-                return left + right
-
-            case TokenType.GREATER:
-                return left > right
-            case TokenType.GREATER_EQUAL:
-                return left >= right
-            case TokenType.LESS:
-                return left < right
-            case TokenType.LESS_EQUAL:
-                return left <= right
-
-            case TokenType.BANG_EQUAL:
-                return not left == right
-            case TokenType.EQUAL_EQUAL:
-                return left == right
-
-        return None
+        try:
+            match expr.operator.type:
+                case TokenType.MINUS:
+                    return subtract(left, right)
+                case TokenType.SLASH:
+                    return left / right
+                case TokenType.STAR:
+                    return multiply(left, right)
+                case TokenType.PLUS:
+                    return add(left, right)
+
+                case TokenType.GREATER:
+                    return left > right
+                case TokenType.GREATER_EQUAL:
+                    return left >= right
+                case TokenType.LESS:
+                    return left < right
+                case TokenType.LESS_EQUAL:
+                    return left <= right
+
+                case TokenType.BANG_EQUAL:
+                    return not left == right
+                case TokenType.EQUAL_EQUAL:
+                    return left == right
+
+            return None
+        except (TypeError, ZeroDivisionError):
+            self.double_error(expr, left, right)
+            raise
+
+    def double_error(self, expr: Expr.Binary, left: object, right: object) -> None:
+        """
+        Redo an operation that failed with int operands on floats, so that
+        the error raised names the types Lox numbers have.
+        """
+        OPERATORS[expr.operator.type](to_float(left), to_float(right))
+
+    def generic_binary(self, expr: Expr.Binary, left: object, right: object) -> object:
+        """visit_binary_expr's result, for operands already evaluated."""
+        try:
+            return OPERATORS[expr.operator.type](left, right)
+        except (TypeError, ZeroDivisionError):
+            self.double_error(expr, left, right)
+            raise
+
+    # Specialized nodes from Quickening. Each checks the operand types its
+    # variant was chosen for and falls back to the generic node if they
+    # have changed.
+
+    def visit_number_binary_expr(self, expr: Expr.Binary) -> object:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if left.__class__ is float and right.__class__ is float:
+            return expr.op(left, right)
+        deoptimize(expr, Expr.Binary)
+        return self.generic_binary(expr, left, right)
+
+    def visit_int_binary_expr(self, expr: Expr.Binary) -> object:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if left.__class__ is int and right.__class__ is int:
+            return expr.op(left, right)
+        deoptimize(expr, Expr.Binary)
+        return self.generic_binary(expr, left, right)
+
+    def visit_int_arithmetic_expr(self, expr: Expr.Binary) -> object:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if left.__class__ is int and right.__class__ is int:
+            value = expr.op(left, right)
+            if -MAX_EXACT <= value <= MAX_EXACT:
+                return value
+            return float(value)
+        deoptimize(expr, Expr.Binary)
+        return self.generic_binary(expr, left, right)
+
+    def visit_int_multiply_expr(self, expr: Expr.Binary) -> object:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if left.__class__ is int and right.__class__ is int:
+            return multiply(left, right)
+        deoptimize(expr, Expr.Binary)
+        return self.generic_binary(expr, left, right)
+
+    def visit_string_concat_expr(self, expr: Expr.Binary) -> object:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if left.__class__ is str and right.__class__ is str:
+            return left + right
+        deoptimize(expr, Expr.Binary)
+        return self.generic_binary(expr, left, right)
+
+    def visit_equality_expr(self, expr: Expr.Binary) -> object:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if expr.operator.type == TokenType.EQUAL_EQUAL:
+            return left == right
+        return not left == right
+
+    def visit_number_negate_expr(self, expr: Expr.Unary) -> object:
+        right = expr.right.accept(self)
+        if right.__class__ is float:
+            return -right
+        deoptimize(expr, Expr.Unary)
+        return negate(right)
+
+    def visit_int_negate_expr(self, expr: Expr.Unary) -> object:
+        right = expr.right.accept(self)
+        if right.__class__ is not int:
+            deoptimize(expr, Expr.Unary)
+        return negate(right)
+
+    def visit_not_expr(self, expr: Expr.Unary) -> object:
+        right = expr.right.accept(self)
+        return right is None or right is False
+
+    def visit_and_expr(self, expr: Expr.Logical) -> object:
+        left = expr.left.accept(self)
+        if left is None or left is False:
+            return left
+        return expr.right.accept(self)
+
+    def visit_or_expr(self, expr: Expr.Logical) -> object:
+        left = expr.left.accept(self)
+        if left is None or left is False:
+            return expr.right.accept(self)
+        return left
 
     def visit_call_expr(self, expr: Expr.Call) -> object:
-        callee = self.evaluate(expr.callee)
-        arguments = []
-        for arg in expr.arguments:
-            arguments.append(self.evaluate(arg))
+        # Fast path for a global callee that is known good; see evaluate_call.
+        if expr.version == self.globals.version:
+            return expr.cache.call(self, list(map(self.evaluate, expr.arguments)))
+
+        func, arguments = self.evaluate_call(expr)
+        return func.call(self, arguments)
+
+    def evaluate_call(self, expr: Expr.Call) -> Tuple[LoxCallable, List[object]]:
+        """Evaluate and check a call's callee and arguments, without calling."""
+        # `cache` is the last callee that passed the checks below here; a
+        # call site always passes the same number of arguments, so they
+        # don't need repeating for it. If the callee is a global, a matching
+        # `version` also means the global still holds it, so it isn't even
+        # looked up.
+        version = self.globals.version
+        if expr.version == version:
+            return expr.cache, list(map(self.evaluate, expr.arguments))
 
-        if not isinstance(callee, LoxCallable):
-            raise RuntimeError(
-                expr.paren, "Can only call functions and classes.")
+        callee = self.evaluate(expr.callee)
+        arguments = list(map(self.evaluate, expr.arguments))
 
-        func = callee
+        if callee is not expr.cache:
+            if not isinstance(callee, LoxCallable):
+                raise RuntimeError(
+                    expr.paren, "Can only call functions and classes.")
 
-        if len(arguments) != func.arity():
-            raise RuntimeError(
-                expr.paren, f"Expected {func.arity()} arguments but got {len(arguments)}.")
+            if len(arguments) != callee.arity():
+                raise RuntimeError(
+                    expr.paren, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+            expr.cache = callee
 
-        return func.call(interpreter=self, arguments=arguments)
+        if type(expr.callee) is Expr.Variable and expr.callee.depth < 0:
+            # The version from before the arguments ran, in case one of
+            # them assigned the global.
+            expr.version = version
+        return callee, arguments
 
     def is_truthy(self, obj: object) -> bool:
         if obj == None:
@@ -116,66 +277,90 @@ class Interpreter(Expr.Visitor[object], Stmt.Visitor[object]):
     def evaluate(self, expr: Expr.Expr) -> object:
         return expr.accept(self)
 
-    def execute(self, stmt: Stmt.Stmt):
-        stmt.accept(self)
+    def execute(self, stmt: Stmt.Stmt) -> object:
+        """Run a statement; returns RETURNING if it executed a `return`."""
+        return stmt.accept(self)
 
-    def executeBlock(self, statements: List[Stmt.Stmt], environment: Environment) -> None:
+    def executeBlock(self, statements: List[Stmt.Stmt], environment: Environment) -> object:
         previous_env = self.environment
         try:
             self.environment = environment
             for statement in statements:
-                self.execute(statement)
+                if statement.accept(self) is RETURNING:
+                    return RETURNING
         finally:  # restore the previous env after execution, even if there is exception
             self.environment = previous_env
 
-    def visit_block_stmt(self, stmt: Stmt.Block) -> None:
-        self.executeBlock(stmt.statements, Environment(
+    def visit_block_stmt(self, stmt: Stmt.Block) -> object:
+        return self.executeBlock(stmt.statements, Environment(
             enclosing=self.environment))
-        return
 
     def visit_expression_stmt(self, stmt: Stmt.Expr) -> None:
         self.evaluate(stmt.expression)
 
     def visit_function_stmt(self, stmt: Stmt.Function):
         func = LoxFunction(stmt, self.environment)
-        self.environment.define(stmt.name.lexeme, func)
+        self.declare(stmt.name.lexeme, func)
 
-    def visit_if_stmt(self, stmt: Stmt.If) -> None:
+    def visit_if_stmt(self, stmt: Stmt.If) -> object:
         if self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.thenBranch)
+            return self.execute(stmt.thenBranch)
         elif stmt.elseBranch:
-            self.execute(stmt.elseBranch)
+            return self.execute(stmt.elseBranch)
 
     def visit_print_stmt(self, stmt: Stmt.Print) -> None:
         value = self.evaluate(stmt.expresssion)
-        print(self.stringify(value))
+        self.output.write_line(self.stringify(value))
     
-    def visit_return_stmt(self, stmt: Stmt.Return) -> None:
+    def visit_return_stmt(self, stmt: Stmt.Return) -> object:
         value = None
-        if stmt.value:
+        if type(stmt.value) is Expr.Call:
+            func, arguments = self.evaluate_call(stmt.value)
+            if isinstance(func, LoxFunction):
+                # A tail call: LoxFunction.call makes it once this
+                # function's frames have unwound.
+                value = TailCall(func, arguments)
+            else:
+                value = func.call(self, arguments)
+        elif stmt.value:
             value = self.evaluate(stmt.value)
-        
-        raise Return(value)
+
+        self.return_value = value
+        return RETURNING
 
     def visit_var_stmt(self, stmt: Stmt.Var) -> None:
         value = None
         if stmt.initializer is not None:
             value = self.evaluate(stmt.initializer)
-        self.environment.define(stmt.name.lexeme, value)
+        self.declare(stmt.name.lexeme, value)
 
-    def visit_while_stmt(self, stmt) -> None:
+    def visit_while_stmt(self, stmt) -> object:
         while self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.body)
+            if self.execute(stmt.body) is RETURNING:
+                return RETURNING
 
     def visit_assign_expr(self, expr: Expr.Assign) -> object:
         value = self.evaluate(expr.value)
-        self.environment.assign(expr.name, value)
+        if expr.depth < 0:
+            self.globals.assign(expr.name, value)
+        else:
+            self.environment.assign_at(expr.depth, expr.slot, value)
         return value
 
+    def declare(self, name: str, value: object) -> None:
+        # Locals take the next slot of the current environment, in the
+        # same order the Resolver numbered them.
+        if self.environment is self.globals:
+            self.globals.define(name, value)
+        else:
+            self.environment.define(value)
+
     def stringify(self, obj: object) -> str:
         if obj is None:
             return "nil"
-        if isinstance(obj, int) or isinstance(obj, float):
+        if obj.__class__ is int:  # an integral number, already exact
+            return str(obj)
+        if isinstance(obj, float):
             s = str(obj)
             if s.endswith('.0'):
                 s = s[:-2]
@@ -1,21 +1,81 @@
+import argparse
+from contextlib import ExitStack, contextmanager
+import mmap
+import os
+import signal
 import sys
+import time
+from typing import Iterator, Iterable, List, Optional
+from AstCache import AstCache
+from ClosureCompiler import ClosureInterpreter
 from Interpreter import Interpreter
-from Parser import Parser
-from Scanner import Scanner
-from ErrorReporter import hadError, hadRuntimeError
+from MemStats import MemStats
+from Output import StreamSink
+from Optimizer import Optimizer, PASSES
+from Profiler import Profiler, ProfilingInterpreter
+from Parser import Parser, TokenStream
+from RegexScanner import RegexScanner
+from Resolver import Resolver
+from Sampler import Sampler
+from Scanner import Scanner, StreamingScanner
+from Stats import CountingInterpreter, CountingProfilingInterpreter, RunStats
+from Tracer import Tracer
+from Transpiler import PythonInterpreter
+from VM import MAX_DEPTH, VM
+import ErrorReporter
+import Stmt
 
 
+BACKENDS = {
+    'tree': Interpreter,
+    'vm': VM,
+    'closure': ClosureInterpreter,
+    'python': PythonInterpreter,
+}
+
+SCANNERS = {
+    'char': lambda source: Scanner(source).scanTokens(),
+    'regex': lambda source: RegexScanner(source).scanTokens(),
+    'buffer': lambda source: RegexScanner(source).scanBuffer(),
+}
+
 interpreter = Interpreter()
+scan = SCANNERS['char']
+optimizer = Optimizer()
+cache: Optional[AstCache] = None
+tracer: Optional[Tracer] = None
+stats: Optional[RunStats] = None
+memstats: Optional[MemStats] = None
+
+
+class ArgumentParser(argparse.ArgumentParser):
+    def error(self, message: str):
+        self.print_usage(sys.stderr)
+        print(f"{self.prog}: error: {message}", file=sys.stderr)
+        sys.exit(64)
+
 
+def runFile(path: str, stream: Optional[str] = None):
+    if stream == 'mmap':
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:  # mmap rejects empty files
+                runStream([])
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                    runStream(line.decode('utf-8')
+                              for line in iter(m.readline, b''))
+    elif stream == 'file':
+        with open(path, 'r') as f:
+            runStream(f)
+    else:
+        with open(path, 'r') as f:
+            bytes = f.read()
 
-def runFile(path: str):
-    with open(path, 'r') as f:
-        bytes = f.read()
+        run(bytes, path)
 
-    run(bytes)
-    if hadError:
+    if ErrorReporter.hadError:
         sys.exit(65)
-    if hadRuntimeError:
+    if ErrorReporter.hadRuntimeError:
         sys.exit(70)
 
 
@@ -29,26 +89,237 @@ def runPrompt():
             break
 
         run(line)
-        hadError = False
+        ErrorReporter.hadError = False
+
 
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Context for one step of running a program, traced with --trace,
+    timed with --stats and measured with --memstats.
+    """
+    with ExitStack() as recorders:
+        for recorder in (tracer, stats, memstats):
+            if recorder is not None:
+                recorders.enter_context(recorder.span(name))
+        yield
 
-def run(source: str):
-    scanner = Scanner(source)
-    tokens = scanner.scanTokens()
-    parser = Parser(tokens)
-    statements = parser.parse()
 
-    if hadError:
+def run(source: str, path: Optional[str] = None):
+    passes = [optimization.name for optimization in optimizer.passes]
+    if cache is not None and path is not None:
+        with phase('cache load'):
+            statements = cache.load(path, source, passes)
+        if statements is not None:
+            if stats is not None:
+                stats.add_nodes(statements)
+            with phase('interpret'):
+                interpreter.interpret(statements)
+            return
+
+    with phase('scan'):
+        tokens = scan(source)
+    with phase('parse'):
+        parser = Parser(tokens)
+        statements = parser.parse()
+    if stats is not None:
+        stats.add_tokens(len(tokens))
+        stats.add_nodes(statements)
+
+    # Stop if there was a syntax error.
+    if ErrorReporter.hadError:
+        return
+
+    statements = prepare(statements)
+    if statements is None:
         return
 
-    interpreter.interpret(statements)
+    if cache is not None and path is not None:
+        with phase('cache store'):
+            cache.store(path, source, passes, statements)
+    with phase('interpret'):
+        interpreter.interpret(statements)
+
+
+def runStream(lines: Iterable[str]):
+    """
+    Scan, parse and run a script incrementally, executing each top-level
+    statement as soon as it has been parsed. Unlike run, statements before
+    a syntax error have already executed by the time it is reported.
+    """
+    scanner = StreamingScanner(lines)
+    parser = Parser(TokenStream(scanner.scanIter()))
+    for statement in parser.parseIter():
+        # Keep parsing after an error, to report every syntax error, but
+        # stop executing.
+        if ErrorReporter.hadError or ErrorReporter.hadRuntimeError:
+            continue
+        execute([statement])
+
+
+def prepare(statements: List[Stmt.Stmt]) -> Optional[List[Stmt.Stmt]]:
+    """Resolve and optimize a parsed program; None if it has errors."""
+    try:
+        # The program is checked as written, so that which programs
+        # compile doesn't depend on the optimization passes enabled.
+        with phase('resolve'):
+            Resolver().resolve(statements)
+
+        # Stop if there was a resolution error.
+        if ErrorReporter.hadError:
+            return None
+
+        if optimizer.passes:
+            with phase('optimize'):
+                optimized = optimizer.optimize(statements)
+
+            # Pruned branches may have declared locals, so the slots are
+            # numbered again for the code that is left.
+            with phase('resolve'):
+                Resolver().resolve(optimized)
+            statements = optimized
+    except RecursionError:
+        ErrorReporter.nesting_error(statements)
+        return None
+
+    return statements
+
+
+def execute(statements: List[Stmt.Stmt]):
+    if stats is not None:
+        stats.add_nodes(statements)
+    statements = prepare(statements)
+    if statements is not None:
+        with phase('interpret'):
+            interpreter.interpret(statements)
 
 
 def main(args):
-    if len(args) > 1:
-        print("Usage: jlox [script]")
-        sys.exit(64)
-    elif len(args) == 1:
-        runFile(args[0])
+    global interpreter, optimizer, scan, cache, tracer, stats, memstats
+
+    arg_parser = ArgumentParser(prog='jlox')
+    arg_parser.add_argument('script', nargs='?')
+    arg_parser.add_argument('--backend', choices=BACKENDS, default='tree',
+                            help="execution engine (default: tree-walker)")
+    arg_parser.add_argument('--scanner', choices=SCANNERS, default='char',
+                            help="lexer to use (default: char-at-a-time)")
+    arg_parser.add_argument('--stream', action='store_const', const='file',
+                            help="run the script statement by statement as it is read")
+    arg_parser.add_argument('--mmap', action='store_const', const='mmap', dest='stream',
+                            help="like --stream, reading the script through mmap")
+    arg_parser.add_argument('--disable-pass', action='append', default=[],
+                            choices=PASSES, metavar='PASS',
+                            help=f"skip an optimization pass, one of: {', '.join(PASSES)}")
+    arg_parser.add_argument('--no-optimize', action='store_true',
+                            help="skip all optimization passes")
+    arg_parser.add_argument('--max-depth', type=int, metavar='N',
+                            help="limit on nested Lox calls for --backend vm "
+                                 f"(default: {MAX_DEPTH})")
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help="don't read or write .loxc files")
+    arg_parser.add_argument('--cache-dir', metavar='DIR',
+                            help="keep .loxc files under DIR instead of "
+                                 "__loxcache__ next to each script")
+    arg_parser.add_argument('--output-buffer', type=int, metavar='CHARS',
+                            help="characters of print output to collect before "
+                                 "writing it out; 0 writes every line (default: 0 "
+                                 "on a terminal, 65536 otherwise)")
+    arg_parser.add_argument('--profile', action='store_true',
+                            help="time each Lox function and print a report to "
+                                 "stderr at exit (tree backend only)")
+    arg_parser.add_argument('--profile-output', metavar='FILE',
+                            help="with --profile, also write the stats to FILE as JSON")
+    arg_parser.add_argument('--trace', metavar='FILE',
+                            help="write a timeline of the run's phases and of every "
+                                 "function call (tree backend only) to FILE in Chrome "
+                                 "Trace Event format")
+    arg_parser.add_argument('--stats', action='store_true',
+                            help="print time per phase and counts of tokens, nodes, "
+                                 "statements, calls and environments to stderr at exit "
+                                 "(runtime counts need the tree backend)")
+    arg_parser.add_argument('--memstats', action='store_true',
+                            help="trace allocations and print the memory each phase "
+                                 "retained, its top allocation sites and the live "
+                                 "objects by kind to stderr at exit (slow)")
+    arg_parser.add_argument('--sample', metavar='FILE',
+                            help="sample the running Lox line and call stack and write "
+                                 "them to FILE as folded stacks (tree backend only)")
+    arg_parser.add_argument('--sample-interval', type=float, default=1.0, metavar='MS',
+                            help="CPU time between samples for --sample (default: 1)")
+    options = arg_parser.parse_args(args)
+
+    if options.max_depth is not None:
+        if options.backend != 'vm':
+            arg_parser.error("--max-depth requires --backend vm")
+        if options.max_depth < 1:
+            arg_parser.error("--max-depth must be at least 1")
+    if options.output_buffer is not None and options.output_buffer < 0:
+        arg_parser.error("--output-buffer can't be negative")
+    if options.profile and options.backend != 'tree':
+        arg_parser.error("--profile requires --backend tree")
+    if options.profile_output is not None and not options.profile:
+        arg_parser.error("--profile-output requires --profile")
+    if options.sample is not None:
+        if options.backend != 'tree':
+            arg_parser.error("--sample requires --backend tree")
+        if not hasattr(signal, 'setitimer'):
+            arg_parser.error("--sample isn't supported on this platform")
+        if options.sample_interval <= 0:
+            arg_parser.error("--sample-interval must be positive")
+    output = StreamSink(buffer_size=options.output_buffer)
+    profiler = None
+    if options.trace is not None:
+        tracer = profiler = Tracer(options.trace)
+    elif options.profile:
+        profiler = Profiler()
+    if options.stats:
+        stats = RunStats()
+    if stats is not None and options.backend == 'tree' and profiler is not None:
+        interpreter = CountingProfilingInterpreter(profiler, output=output)
+    elif stats is not None and options.backend == 'tree':
+        interpreter = CountingInterpreter(output=output)
+    elif profiler is not None and options.backend == 'tree':
+        interpreter = ProfilingInterpreter(profiler, output=output)
+    elif options.max_depth is not None:
+        interpreter = VM(options.max_depth, output=output)
     else:
-        runPrompt()
+        interpreter = BACKENDS[options.backend](output=output)
+    scan = SCANNERS[options.scanner]
+    optimizer = Optimizer(PASSES if options.no_optimize else options.disable_pass)
+    cache = None if options.no_cache else AstCache(options.cache_dir)
+
+    if options.memstats:
+        memstats = MemStats()
+        memstats.start()
+    sampler = None
+    if options.sample is not None:
+        sampler = Sampler(interpreter, options.sample_interval / 1000)
+        start = time.perf_counter()
+        sampler.start()
+    try:
+        if options.script is not None:
+            runFile(options.script, options.stream)
+        else:
+            runPrompt()
+    finally:
+        if sampler is not None:
+            sampler.stop()
+            sampler.summary(sys.stderr, time.perf_counter() - start)
+            with open(options.sample, 'w') as f:
+                sampler.write_folded(f)
+        if options.profile:
+            profiler.report(sys.stderr)
+            if options.profile_output is not None:
+                profiler.dump(options.profile_output)
+        if tracer is not None:
+            tracer.close()
+        if stats is not None:
+            stats.collect(interpreter)
+            stats.report(sys.stderr)
+        if memstats is not None:
+            memstats.stop()
+            memstats.report(sys.stderr)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
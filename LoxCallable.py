@@ -19,3 +19,6 @@ class LoxCallable(ABC):
     @abstractmethod
     def toString(self) -> str:
         ...
+
+    def __str__(self) -> str:
+        return self.toString()
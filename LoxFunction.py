@@ -2,31 +2,59 @@ from __future__ import annotations
 from typing import List, TYPE_CHECKING
 from Environment import Environment
 from LoxCallable import LoxCallable
-from Return import Return
+from Return import RETURNING
 import Stmt
 
 if TYPE_CHECKING:
     from Interpreter import Interpreter
 
 
+class TailCall:
+    """
+    Left in Interpreter.return_value by `return f(...);` when f is a
+    LoxFunction: the call for the returning function's caller to make.
+    """
+    __slots__ = ('function', 'arguments')
+
+    def __init__(self, function: 'LoxFunction', arguments: List[object]):
+        self.function = function
+        self.arguments = arguments
+
+
 class LoxFunction(LoxCallable):
     def __init__(self, declaration: Stmt.Function, closure: Environment):
         self.declaration = declaration
         self.closure = closure
+        # Read on every call, so kept as plain attributes.
+        self.body = declaration.body
+        self._arity = len(declaration.params)
 
     def call(self, interpreter: 'Interpreter', arguments: List[object]) -> object:
-        environment = Environment(enclosing=self.closure)
-        for i, param in enumerate(self.declaration.params):
-            environment.define(param.lexeme, arguments[i])
-
+        # Calls in tail position come back as a TailCall and are run by
+        # this loop, so tail recursion doesn't grow the Python stack.
+        # The body is run inline rather than through executeBlock.
+        function = self
+        previous_env = interpreter.environment
         try:
-            interpreter.executeBlock(
-                statements=self.declaration.body, environment=environment)
-        except Return as returnValue:
-            return returnValue.value
+            while True:
+                # Parameters occupy the first slots, in declaration order.
+                interpreter.environment = Environment(function.closure, arguments)
+                for statement in function.body:
+                    if statement.accept(interpreter) is RETURNING:
+                        break
+                else:
+                    return None
+
+                value = interpreter.return_value
+                interpreter.return_value = None
+                if type(value) is not TailCall:
+                    return value
+                function, arguments = value.function, value.arguments
+        finally:
+            interpreter.environment = previous_env
 
     def arity(self) -> int:
-        return len(self.declaration.params)
+        return self._arity
 
     def toString(self) -> str:
         return f"<fn {self.declaration.name.lexeme}>"
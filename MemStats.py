@@ -0,0 +1,129 @@
+from collections import Counter
+import contextlib
+from contextlib import contextmanager
+import gc
+import os
+import tracemalloc
+from typing import Dict, Iterator, TextIO, Tuple
+from Environment import Environment
+import Expr
+from LoxCallable import LoxCallable
+import Stmt
+from Token import Token
+
+KINDS = ('tokens', 'AST nodes', 'environments', 'functions')
+
+# Allocation sites listed for each phase.
+TOP_SITES = 5
+
+# Allocations made by the instrumentation itself, left out of snapshots.
+IGNORED = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, contextlib.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+
+class PhaseMemory:
+    __slots__ = ('retained', 'peak', 'sites', 'live')
+
+    def __init__(self):
+        self.retained = 0  # bytes still allocated when the phase ended
+        self.peak = 0  # most bytes allocated at once during the phase
+        self.sites: Counter = Counter()  # bytes retained per allocation site
+        self.live: Dict[str, int] = {}  # objects of each kind after the phase
+
+
+def count_live() -> Tuple[Dict[str, int], Counter]:
+    """
+    The live tokens, AST nodes, environments and functions, and the
+    functions by declaration, which is as close to a Lox source line as
+    an allocation can be traced.
+    """
+    counts = dict.fromkeys(KINDS, 0)
+    functions: Counter = Counter()
+    for obj in gc.get_objects():
+        if isinstance(obj, Token):
+            counts['tokens'] += 1
+        elif isinstance(obj, (Expr.Expr, Stmt.Stmt)):
+            counts['AST nodes'] += 1
+        elif isinstance(obj, Environment):
+            counts['environments'] += 1
+        elif isinstance(obj, LoxCallable):
+            counts['functions'] += 1
+            declaration = getattr(obj, 'declaration', None)
+            where = f" (line {declaration.name.line})" if declaration is not None else ""
+            functions[obj.toString() + where] += 1
+    return counts, functions
+
+
+class MemStats:
+    """
+    Memory used by each phase of Lox.run, measured with tracemalloc:
+    bytes retained and peak bytes per phase, the Python lines that
+    allocated what a phase retained, and how many tokens, AST nodes,
+    environments and functions were alive when it ended.
+
+    Tracing every allocation slows the interpreter down several times
+    over and counting live objects walks the whole heap after each
+    phase, so this is for finding what a script's memory goes to, not
+    for timing it.
+    """
+
+    def __init__(self, frames: int = 1):
+        self.frames = frames
+        self.phases: Dict[str, PhaseMemory] = {}
+        self.functions: Counter = Counter()  # as of the end of the last phase
+
+    def start(self) -> None:
+        tracemalloc.start(self.frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Measure the body of a `with` statement as the phase `name`."""
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = PhaseMemory()
+        before = tracemalloc.take_snapshot().filter_traces(IGNORED)
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            phase.retained += current - start
+            phase.peak = max(phase.peak, peak - start)
+            after = tracemalloc.take_snapshot().filter_traces(IGNORED)
+            for difference in after.compare_to(before, 'lineno'):
+                if difference.size_diff > 0:
+                    phase.sites[str(difference.traceback[0])] += difference.size_diff
+            phase.live, self.functions = count_live()
+
+    def report(self, out: TextIO) -> None:
+        print(f"{'phase':12} {'retained (KiB)':>15} {'peak (KiB)':>11}  "
+              + '  '.join(f"{kind:>12}" for kind in KINDS), file=out)
+        for name, phase in self.phases.items():
+            print(f"{name:12} {phase.retained / 1024:>15.1f} {phase.peak / 1024:>11.1f}  "
+                  + '  '.join(f"{phase.live[kind]:>12}" for kind in KINDS), file=out)
+
+        for name, phase in self.phases.items():
+            if phase.sites:
+                print(f"\ntop allocation sites, {name}:", file=out)
+                for site, size in phase.sites.most_common(TOP_SITES):
+                    print(f"{size / 1024:>10.1f} KiB  {shorten(site)}", file=out)
+
+        if self.functions:
+            print("\nlive functions by declaration:", file=out)
+            for function, count in self.functions.most_common():
+                print(f"{count:>10}  {function}", file=out)
+
+
+def shorten(site: str) -> str:
+    """An allocation site relative to the working directory, if under it."""
+    relative = os.path.relpath(site)
+    return site if relative.startswith('..') else relative
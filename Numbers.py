@@ -0,0 +1,59 @@
+# Lox numbers are doubles, but integral literals are kept as Python ints,
+# which are cheaper to compare and to print. That is invisible to Lox code
+# as long as every int is one a double would hold exactly, i.e. within
+# ±2**53, and as long as -0 is still produced where a double would produce
+# it. The arithmetic here takes care of both; `/` needs no help, since
+# Python's int true division already rounds like a double division would.
+
+MAX_EXACT = 2 ** 53
+
+
+def number_literal(text: str) -> object:
+    """The value of a NUMBER token's lexeme."""
+    if '.' not in text:
+        value = int(text)
+        if value <= MAX_EXACT:
+            return value
+    return float(text)
+
+
+def exact(value: object) -> object:
+    """
+    An int result past ±2**53 becomes the float a double operation would
+    have produced: float() rounds the exact result, which is what IEEE
+    addition, subtraction and multiplication do too.
+    """
+    if value.__class__ is int and not -MAX_EXACT <= value <= MAX_EXACT:
+        return float(value)
+    return value
+
+
+def add(left: object, right: object) -> object:
+    return exact(left + right)
+
+
+def subtract(left: object, right: object) -> object:
+    return exact(left - right)
+
+
+def multiply(left: object, right: object) -> object:
+    if left.__class__ is int and right.__class__ is int:
+        value = left * right
+        if value == 0 and (left < 0 or right < 0):
+            return -0.0
+        return exact(value)
+    # As floats, so that "ab" * 2 fails the way it does with a double.
+    return to_float(left) * to_float(right)
+
+
+def negate(value: object) -> object:
+    if value.__class__ is int and value == 0:
+        return -0.0
+    return -value
+
+
+def to_float(value: object) -> object:
+    """For backends that do plain double arithmetic: ints become floats."""
+    if value.__class__ is int:
+        return float(value)
+    return value
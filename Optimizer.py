@@ -0,0 +1,232 @@
+from typing import Dict, Iterable, List, Optional, Type
+import Expr
+from Numbers import add, multiply, negate, subtract
+import Stmt
+from TokenType import TokenType
+
+
+class Pass(Expr.Visitor[Expr.Expr], Stmt.Visitor[Optional[Stmt.Stmt]]):
+    """
+    Base for AST rewriting passes. Every visit method returns the node that
+    replaces the one visited; by default that is the same node, with its
+    children rewritten in place. A statement visit may return None to drop
+    the statement.
+
+    The Resolver runs again on the optimized program, so passes don't
+    need to preserve (depth, slot) annotations.
+    """
+    name = ""
+
+    def run(self, statements: List[Stmt.Stmt]) -> List[Stmt.Stmt]:
+        return self.statements(statements)
+
+    def statements(self, statements: List[Stmt.Stmt]) -> List[Stmt.Stmt]:
+        result = []
+        for statement in statements:
+            statement = statement.accept(self)
+            if statement is not None:
+                result.append(statement)
+        return result
+
+    def statement(self, stmt: Stmt.Stmt) -> Stmt.Stmt:
+        """Rewrite a statement that must stay a statement, like a loop body."""
+        stmt = stmt.accept(self)
+        if stmt is None:
+            return Stmt.Block([])
+        return stmt
+
+    def visit_block_stmt(self, stmt: Stmt.Block) -> Optional[Stmt.Stmt]:
+        stmt.statements = self.statements(stmt.statements)
+        return stmt
+
+    def visit_expression_stmt(self, stmt: Stmt.Expression) -> Optional[Stmt.Stmt]:
+        stmt.expression = stmt.expression.accept(self)
+        return stmt
+
+    def visit_function_stmt(self, stmt: Stmt.Function) -> Optional[Stmt.Stmt]:
+        stmt.body = self.statements(stmt.body)
+        return stmt
+
+    def visit_if_stmt(self, stmt: Stmt.If) -> Optional[Stmt.Stmt]:
+        stmt.condition = stmt.condition.accept(self)
+        stmt.thenBranch = self.statement(stmt.thenBranch)
+        if stmt.elseBranch is not None:
+            stmt.elseBranch = self.statement(stmt.elseBranch)
+        return stmt
+
+    def visit_print_stmt(self, stmt: Stmt.Print) -> Optional[Stmt.Stmt]:
+        stmt.expresssion = stmt.expresssion.accept(self)
+        return stmt
+
+    def visit_return_stmt(self, stmt: Stmt.Return) -> Optional[Stmt.Stmt]:
+        if stmt.value is not None:
+            stmt.value = stmt.value.accept(self)
+        return stmt
+
+    def visit_var_stmt(self, stmt: Stmt.Var) -> Optional[Stmt.Stmt]:
+        if stmt.initializer is not None:
+            stmt.initializer = stmt.initializer.accept(self)
+        return stmt
+
+    def visit_while_stmt(self, stmt: Stmt.While) -> Optional[Stmt.Stmt]:
+        stmt.condition = stmt.condition.accept(self)
+        stmt.body = self.statement(stmt.body)
+        return stmt
+
+    def visit_assign_expr(self, expr: Expr.Assign) -> Expr.Expr:
+        expr.value = expr.value.accept(self)
+        return expr
+
+    def visit_binary_expr(self, expr: Expr.Binary) -> Expr.Expr:
+        expr.left = expr.left.accept(self)
+        expr.right = expr.right.accept(self)
+        return expr
+
+    def visit_call_expr(self, expr: Expr.Call) -> Expr.Expr:
+        expr.callee = expr.callee.accept(self)
+        expr.arguments = [argument.accept(self)
+                          for argument in expr.arguments]
+        return expr
+
+    def visit_grouping_expr(self, expr: Expr.Grouping) -> Expr.Expr:
+        expr.expression = expr.expression.accept(self)
+        return expr
+
+    def visit_literal_expr(self, expr: Expr.Literal) -> Expr.Expr:
+        return expr
+
+    def visit_logical_expr(self, expr: Expr.Logical) -> Expr.Expr:
+        expr.left = expr.left.accept(self)
+        expr.right = expr.right.accept(self)
+        return expr
+
+    def visit_unary_expr(self, expr: Expr.Unary) -> Expr.Expr:
+        expr.right = expr.right.accept(self)
+        return expr
+
+    def visit_variable_expr(self, expr: Expr.Variable) -> Expr.Expr:
+        return expr
+
+
+def is_truthy(value: object) -> bool:
+    return value is not None and value is not False
+
+
+class GroupingElision(Pass):
+    """Replace `(expr)` with `expr`; parentheses only matter to the parser."""
+    name = "grouping"
+
+    def visit_grouping_expr(self, expr: Expr.Grouping) -> Expr.Expr:
+        return expr.expression.accept(self)
+
+
+class ConstantFolding(Pass):
+    """
+    Evaluate unary and binary operators whose operands are literals.
+    Operations that would fail at runtime, like `"a" - 1`, are left alone
+    so the error still happens when (and if) the code runs.
+    """
+    name = "fold"
+
+    BINARY = {
+        TokenType.MINUS: subtract,
+        TokenType.SLASH: lambda a, b: a / b,
+        TokenType.STAR: multiply,
+        TokenType.PLUS: add,
+        TokenType.GREATER: lambda a, b: a > b,
+        TokenType.GREATER_EQUAL: lambda a, b: a >= b,
+        TokenType.LESS: lambda a, b: a < b,
+        TokenType.LESS_EQUAL: lambda a, b: a <= b,
+        TokenType.BANG_EQUAL: lambda a, b: not a == b,
+        TokenType.EQUAL_EQUAL: lambda a, b: a == b,
+    }
+
+    def visit_grouping_expr(self, expr: Expr.Grouping) -> Expr.Expr:
+        expr.expression = expr.expression.accept(self)
+        if isinstance(expr.expression, Expr.Literal):
+            return expr.expression
+        return expr
+
+    def visit_binary_expr(self, expr: Expr.Binary) -> Expr.Expr:
+        expr.left = expr.left.accept(self)
+        expr.right = expr.right.accept(self)
+        if not isinstance(expr.left, Expr.Literal) or not isinstance(expr.right, Expr.Literal):
+            return expr
+
+        try:
+            value = self.BINARY[expr.operator.type](
+                expr.left.value, expr.right.value)
+        except (TypeError, ArithmeticError):
+            return expr
+        return Expr.Literal(value)
+
+    def visit_unary_expr(self, expr: Expr.Unary) -> Expr.Expr:
+        expr.right = expr.right.accept(self)
+        if not isinstance(expr.right, Expr.Literal):
+            return expr
+
+        if expr.operator.type == TokenType.BANG:
+            return Expr.Literal(not is_truthy(expr.right.value))
+
+        try:
+            return Expr.Literal(negate(expr.right.value))
+        except TypeError:
+            return expr
+
+
+class LogicalFolding(Pass):
+    """Short-circuit `and`/`or` whose left operand is a literal."""
+    name = "logical"
+
+    def visit_logical_expr(self, expr: Expr.Logical) -> Expr.Expr:
+        expr.left = expr.left.accept(self)
+        expr.right = expr.right.accept(self)
+        if not isinstance(expr.left, Expr.Literal):
+            return expr
+
+        if is_truthy(expr.left.value) == (expr.operator.type == TokenType.OR):
+            return expr.left
+        return expr.right
+
+
+class BranchPruning(Pass):
+    """
+    Drop the branch of an `if` that a literal condition never takes, and
+    loops whose literal condition is falsy.
+    """
+    name = "prune"
+
+    def visit_if_stmt(self, stmt: Stmt.If) -> Optional[Stmt.Stmt]:
+        stmt = super().visit_if_stmt(stmt)
+        if not isinstance(stmt.condition, Expr.Literal):
+            return stmt
+
+        if is_truthy(stmt.condition.value):
+            return stmt.thenBranch
+        return stmt.elseBranch
+
+    def visit_while_stmt(self, stmt: Stmt.While) -> Optional[Stmt.Stmt]:
+        stmt = super().visit_while_stmt(stmt)
+        if isinstance(stmt.condition, Expr.Literal) and not is_truthy(stmt.condition.value):
+            return None
+        return stmt
+
+
+# In the order they run; later passes see the results of earlier ones.
+PASSES: Dict[str, Type[Pass]] = {
+    pass_type.name: pass_type
+    for pass_type in (GroupingElision, ConstantFolding, LogicalFolding, BranchPruning)
+}
+
+
+class Optimizer:
+    """Runs the enabled passes over a program, in PASSES order."""
+
+    def __init__(self, disabled: Iterable[str] = ()):
+        self.passes = [pass_type() for name, pass_type in PASSES.items()
+                       if name not in disabled]
+
+    def optimize(self, statements: List[Stmt.Stmt]) -> List[Stmt.Stmt]:
+        for optimization in self.passes:
+            statements = optimization.run(statements)
+        return statements
@@ -0,0 +1,70 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, TextIO
+import sys
+
+
+# Characters of output StreamSink collects before writing them out, when
+# its stream isn't a terminal. The stream is text, so its encoding, and
+# the bytes this comes to, are up to the stream.
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+class Sink(ABC):
+    """Where the output of Lox `print` statements goes."""
+
+    @abstractmethod
+    def write_line(self, text: str) -> None:
+        ...
+
+    def flush(self) -> None:
+        pass
+
+
+class StreamSink(Sink):
+    """
+    Writes lines to a text stream, sys.stdout by default, in chunks of
+    about `buffer_size` characters. A buffer size of 0 writes and flushes
+    every line, which is the default when the stream is a terminal.
+    Interpreter.interpret flushes the rest when it returns.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, buffer_size: Optional[int] = None):
+        # With no stream, sys.stdout is looked up on every flush, so that
+        # redirecting it later still catches the output, as with print().
+        self.stream = stream
+        if buffer_size is None:
+            isatty = getattr(stream or sys.stdout, 'isatty', None)
+            buffer_size = 0 if isatty is not None and isatty() else DEFAULT_BUFFER_SIZE
+        self.buffer_size = buffer_size
+        self.lines: List[str] = []
+        self.size = 0
+
+    def write_line(self, text: str) -> None:
+        self.lines.append(text)
+        self.size += len(text) + 1
+        if self.size > self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.lines:
+            return
+        stream = self.stream or sys.stdout
+        self.lines.append('')  # for the last line's newline
+        stream.write('\n'.join(self.lines))
+        self.lines.clear()
+        self.size = 0
+        stream.flush()
+
+
+class MemorySink(Sink):
+    """Keeps every line in `lines`, for embedding and tests."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def write_line(self, text: str) -> None:
+        self.lines.append(text)
+
+    def getvalue(self) -> str:
+        """The output as print() would have written it."""
+        return ''.join(line + '\n' for line in self.lines)
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Callable, Iterator, List, Sequence
 from ErrorReporter import error_at_token
 import Expr
 import Stmt
@@ -10,18 +10,54 @@ class ParseError(RuntimeError):
     pass
 
 
+class TokenStream:
+    """
+    Indexable view over a token iterator for the Parser. Tokens are pulled
+    on demand, and only the current and previous ones are retained, which
+    is all the lookahead the grammar needs.
+    """
+
+    def __init__(self, tokens: Iterator[Token]):
+        self.tokens = tokens
+        self.window: List[Token] = []  # tokens from index `base` onwards
+        self.base = 0
+
+    def __getitem__(self, index: int) -> Token:
+        offset = index - self.base
+        if offset > 1:
+            del self.window[:offset - 1]
+            self.base = index - 1
+            offset = 1
+
+        while offset >= len(self.window):
+            self.window.append(next(self.tokens))
+        return self.window[offset]
+
+
 class Parser:
 
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: Sequence[Token]):
         self.tokens = tokens
         self.current: int = 0
+        # A TokenBuffer can report a token's type without building the
+        # Token, so looking ahead (check, match, isAtEnd, synchronize)
+        # doesn't build any; only the tokens advance returns are built.
+        self.typeAt: Callable[[int], TokenType] = getattr(
+            tokens, 'typeAt', None) or (lambda index: tokens[index].type)
 
     def parse(self) -> List[Stmt.Stmt]:
-        statements = []
-        while not self.isAtEnd():
-            statements.append(self.declaration())
+        return list(self.parseIter())
 
-        return statements
+    def parseIter(self) -> Iterator[Stmt.Stmt]:
+        """Yield each top-level declaration as soon as it is parsed."""
+        while not self.isAtEnd():
+            try:
+                yield self.declaration()
+            except RecursionError:
+                # Raised where the nesting got too deep, but caught here,
+                # where there is stack left to recover with.
+                self.error(self.peek(), "Too much nesting.")
+                self.synchronize()
 
     def expression(self) -> Expr.Expr:
         return self.assignment()
@@ -307,7 +343,7 @@ class Parser:
         """Check if the current token has any of the given types."""
         for type in types:
             if self.check(type):
-                self.advance()
+                self.current += 1
                 return True
 
         return False
@@ -322,9 +358,8 @@ class Parser:
         Returns True if the current token is of given type.
         Unlike `match`, this doesn't consume the token.
         """
-        if self.isAtEnd():
-            return False
-        return self.peek().type == type
+        current = self.typeAt(self.current)
+        return current == type and current != TokenType.EOF
 
     def advance(self) -> Token:
         if not self.isAtEnd():
@@ -332,7 +367,7 @@ class Parser:
         return self.previous()
 
     def isAtEnd(self) -> bool:
-        return self.peek().type == TokenType.EOF
+        return self.typeAt(self.current) == TokenType.EOF
 
     def peek(self) -> Token:
         return self.tokens[self.current]
@@ -351,9 +386,9 @@ class Parser:
         """Skip tokens until the start of the next statement."""
         self.advance()
         while not self.isAtEnd():
-            if self.previous().type == TokenType.SEMICOLON:
+            if self.typeAt(self.current - 1) == TokenType.SEMICOLON:
                 return
-            if self.peek().type in {
+            if self.typeAt(self.current) in {
                 TokenType.CLASS,
                 TokenType.FUN,
                 TokenType.VAR,
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import json
+import time
+from typing import Dict, List, TextIO, Tuple
+from Environment import Environment
+from Interpreter import Interpreter
+from LoxCallable import LoxCallable
+from LoxFunction import LoxFunction, TailCall
+from Return import RETURNING
+import Stmt
+
+
+class FunctionStats:
+    """What the profiler knows about one function."""
+    __slots__ = ('name', 'line', 'calls', 'self_time', 'total_time', 'active')
+
+    def __init__(self, name: str, line: int):
+        self.name = name
+        self.line = line  # 0 for native functions
+        self.calls = 0
+        self.self_time = 0.0
+        self.total_time = 0.0
+        self.active = 0  # invocations currently on the stack
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'line': self.line, 'calls': self.calls,
+                'self': self.self_time, 'total': self.total_time}
+
+
+class Profiler:
+    """
+    Call counts, self time and cumulative time for each Lox function,
+    keyed by name and declaration line so that same-named functions in
+    different scopes are kept apart.
+
+    Self time excludes the time spent in the functions a call makes;
+    cumulative time includes it, counted once for recursive functions
+    (as cProfile does). A tail call ends the returning function's call
+    and starts the callee's, since that is what the interpreter does.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.functions: Dict[Tuple[str, int], FunctionStats] = {}
+        # One [stats, start, time spent in callees] per active call.
+        self.stack: List[list] = []
+
+    def function(self, name: str, line: int) -> FunctionStats:
+        key = (name, line)
+        stats = self.functions.get(key)
+        if stats is None:
+            stats = self.functions[key] = FunctionStats(name, line)
+        return stats
+
+    def enter(self, stats: FunctionStats) -> None:
+        stats.calls += 1
+        stats.active += 1
+        self.stack.append([stats, self.clock(), 0.0])
+
+    def exit(self) -> None:
+        stats, start, callees = self.stack.pop()
+        elapsed = self.clock() - start
+        stats.self_time += elapsed - callees
+        stats.active -= 1
+        if not stats.active:
+            stats.total_time += elapsed
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def sorted_stats(self) -> List[FunctionStats]:
+        return sorted(self.functions.values(),
+                      key=lambda stats: stats.self_time, reverse=True)
+
+    def report(self, out: TextIO) -> None:
+        """Print a table of every function called, most self time first."""
+        print(f"{'calls':>10} {'self (s)':>10} {'total (s)':>10}  function", file=out)
+        for stats in self.sorted_stats():
+            if not stats.calls:
+                continue
+            where = f"line {stats.line}" if stats.line else "native"
+            print(f"{stats.calls:>10} {stats.self_time:>10.4f} "
+                  f"{stats.total_time:>10.4f}  {stats.name} ({where})", file=out)
+
+    def dump(self, path: str) -> None:
+        """Write the stats as JSON, times in seconds."""
+        functions = [stats.to_dict() for stats in self.sorted_stats() if stats.calls]
+        with open(path, 'w') as f:
+            json.dump({'functions': functions}, f, indent=2)
+            f.write('\n')
+
+
+class ProfiledFunction(LoxFunction):
+    def __init__(self, declaration: Stmt.Function, closure: Environment, profiler: Profiler):
+        super().__init__(declaration, closure)
+        self.profiler = profiler
+        self.stats = profiler.function(declaration.name.lexeme, declaration.name.line)
+
+    def call(self, interpreter: Interpreter, arguments: List[object]) -> object:
+        # LoxFunction.call, timing each function in a chain of tail calls
+        # separately. Every function a ProfilingInterpreter declares is a
+        # ProfiledFunction, so a TailCall's has stats too.
+        function = self
+        profiler = self.profiler
+        previous_env = interpreter.environment
+        try:
+            while True:
+                profiler.enter(function.stats)
+                try:
+                    interpreter.environment = Environment(function.closure, arguments)
+                    for statement in function.body:
+                        if statement.accept(interpreter) is RETURNING:
+                            break
+                    else:
+                        return None
+                finally:
+                    profiler.exit()
+
+                value = interpreter.return_value
+                interpreter.return_value = None
+                if type(value) is not TailCall:
+                    return value
+                function, arguments = value.function, value.arguments
+        finally:
+            interpreter.environment = previous_env
+
+
+class ProfiledNative(LoxCallable):
+    """A native function, timed under the global name it was defined as."""
+
+    def __init__(self, function: LoxCallable, stats: FunctionStats, profiler: Profiler):
+        self.function = function
+        self.stats = stats
+        self.profiler = profiler
+
+    def call(self, interpreter: Interpreter, arguments: List[object]) -> object:
+        self.profiler.enter(self.stats)
+        try:
+            return self.function.call(interpreter, arguments)
+        finally:
+            self.profiler.exit()
+
+    def arity(self) -> int:
+        return self.function.arity()
+
+    def toString(self) -> str:
+        return self.function.toString()
+
+
+class ProfilingInterpreter(Interpreter):
+    """The tree-walker, recording every Lox and native call in `profiler`."""
+
+    def __init__(self, profiler: Profiler, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profiler = profiler
+        for name, value in self.globals.values.items():
+            if isinstance(value, LoxCallable):
+                self.globals.values[name] = ProfiledNative(
+                    value, profiler.function(name, 0), profiler)
+
+    def visit_function_stmt(self, stmt: Stmt.Function):
+        self.declare(stmt.name.lexeme, ProfiledFunction(stmt, self.environment, self.profiler))
@@ -0,0 +1,187 @@
+import operator
+from typing import Dict, Type
+import Expr
+from Numbers import add, multiply, subtract
+from TokenType import TokenType
+
+
+# A generic Binary, Unary or Logical node is specialized on its operator
+# and the operand types it saw once it has run this many times.
+QUICKEN_AFTER = 8
+
+# Runs a node spends back on the generic path after a failed guard, or
+# after a failed attempt to specialize, before it is tried again.
+BACKOFF = 64
+
+# Arithmetic and comparisons as Python does them, which is right for two
+# floats, and for two ints except where Numbers has to step in.
+NUMBER_OPERATORS = {
+    TokenType.MINUS: operator.sub,
+    TokenType.SLASH: operator.truediv,
+    TokenType.STAR: operator.mul,
+    TokenType.PLUS: operator.add,
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+}
+
+# Same semantics as the `match` in Interpreter.visit_binary_expr, for the
+# specialized nodes to fall back on when their guard fails.
+OPERATORS = {
+    **NUMBER_OPERATORS,
+    TokenType.MINUS: subtract,
+    TokenType.STAR: multiply,
+    TokenType.PLUS: add,
+    TokenType.BANG_EQUAL: lambda a, b: not a == b,
+    TokenType.EQUAL_EQUAL: operator.eq,
+}
+
+
+class NumberBinary(Expr.Binary):
+    """Arithmetic or comparison on two floats; `op` is set per subclass."""
+    __slots__ = ()
+
+    def accept(self, visitor: 'Expr.Visitor[Expr.R]') -> 'Expr.R':
+        return visitor.visit_number_binary_expr(self)
+
+
+class IntBinary(Expr.Binary):
+    """A comparison on two ints; `op` is set per subclass."""
+    __slots__ = ()
+
+    def accept(self, visitor: 'Expr.Visitor[Expr.R]') -> 'Expr.R':
+        return visitor.visit_int_binary_expr(self)
+
+
+class IntArithmetic(IntBinary):
+    """`+` or `-` on two ints, which may leave the range ints are used for."""
+    __slots__ = ()
+
+    def accept(self, visitor: 'Expr.Visitor[Expr.R]') -> 'Expr.R':
+        return visitor.visit_int_arithmetic_expr(self)
+
+
+class IntMultiply(Expr.Binary):
+    """`*` on two ints."""
+    __slots__ = ()
+
+    def accept(self, visitor: 'Expr.Visitor[Expr.R]') -> 'Expr.R':
+        return visitor.visit_int_multiply_expr(self)
+
+
+class StringConcat(Expr.Binary):
+    """`+` on two strings."""
+    __slots__ = ()
+
+    def accept(self, visitor: 'Expr.Visitor[Expr.R]') -> 'Expr.R':
+        return visitor.visit_string_concat_expr(self)
+
+
+class Equality(Expr.Binary):
+    """`==` or `!=`, which work on any operands, so need no guard."""
+    __slots__ = ()
+
+    def accept(self, visitor: 'Expr.Visitor[Expr.R]') -> 'Expr.R':
+        return visitor.visit_equality_expr(self)
+
+
+class NumberNegate(Expr.Unary):
+    """`-` on a float."""
+    __slots__ = ()
+
+    def accept(self, visitor: 'Expr.Visitor[Expr.R]') -> 'Expr.R':
+        return visitor.visit_number_negate_expr(self)
+
+
+class IntNegate(Expr.Unary):
+    """`-` on an int."""
+    __slots__ = ()
+
+    def accept(self, visitor: 'Expr.Visitor[Expr.R]') -> 'Expr.R':
+        return visitor.visit_int_negate_expr(self)
+
+
+class Not(Expr.Unary):
+    """`!`, which works on any operand, so needs no guard."""
+    __slots__ = ()
+
+    def accept(self, visitor: 'Expr.Visitor[Expr.R]') -> 'Expr.R':
+        return visitor.visit_not_expr(self)
+
+
+class And(Expr.Logical):
+    __slots__ = ()
+
+    def accept(self, visitor: 'Expr.Visitor[Expr.R]') -> 'Expr.R':
+        return visitor.visit_and_expr(self)
+
+
+class Or(Expr.Logical):
+    __slots__ = ()
+
+    def accept(self, visitor: 'Expr.Visitor[Expr.R]') -> 'Expr.R':
+        return visitor.visit_or_expr(self)
+
+
+def with_operator(base: type, operator_type: TokenType) -> type:
+    """Subclass of `base` whose `op` is the Python operator for `operator_type`."""
+    name = base.__name__ + operator_type.name.title().replace('_', '')
+    return type(name, (base,), {'__slots__': (), 'op': NUMBER_OPERATORS[operator_type]})
+
+
+NUMBER_BINARY: Dict[TokenType, Type[NumberBinary]] = {
+    type: with_operator(NumberBinary, type) for type in NUMBER_OPERATORS
+}
+
+# No variant for `/`: dividing ints by zero raises a differently worded
+# error than doubles do, which only the generic path corrects.
+INT_BINARY: Dict[TokenType, Type[Expr.Binary]] = {
+    type: with_operator(IntBinary, type) for type in NUMBER_OPERATORS
+    if type != TokenType.SLASH
+}
+INT_BINARY[TokenType.PLUS] = with_operator(IntArithmetic, TokenType.PLUS)
+INT_BINARY[TokenType.MINUS] = with_operator(IntArithmetic, TokenType.MINUS)
+INT_BINARY[TokenType.STAR] = IntMultiply
+
+
+def quicken_binary(expr: Expr.Binary, left: object, right: object) -> None:
+    """
+    Swap a generic Binary for the variant matching its operator and the
+    operands it was just evaluated with, if there is one. The variants
+    share Binary's slots, so the node is changed in place by assigning
+    its class; that keeps every reference to it (parents, closures,
+    cached function bodies) pointing at the specialized node.
+    """
+    type = expr.operator.type
+    if type in (TokenType.EQUAL_EQUAL, TokenType.BANG_EQUAL):
+        expr.__class__ = Equality
+    elif left.__class__ is float and right.__class__ is float:
+        expr.__class__ = NUMBER_BINARY[type]
+    elif left.__class__ is int and right.__class__ is int and type in INT_BINARY:
+        expr.__class__ = INT_BINARY[type]
+    elif type == TokenType.PLUS and left.__class__ is str and right.__class__ is str:
+        expr.__class__ = StringConcat
+    else:
+        expr.hits = -BACKOFF
+
+
+def quicken_unary(expr: Expr.Unary, right: object) -> None:
+    if expr.operator.type == TokenType.BANG:
+        expr.__class__ = Not
+    elif right.__class__ is float:
+        expr.__class__ = NumberNegate
+    elif right.__class__ is int:
+        expr.__class__ = IntNegate
+    else:
+        expr.hits = -BACKOFF
+
+
+def quicken_logical(expr: Expr.Logical) -> None:
+    expr.__class__ = Or if expr.operator.type == TokenType.OR else And
+
+
+def deoptimize(expr: Expr.Expr, generic: type) -> None:
+    """Put a node whose guard failed back on the generic path for a while."""
+    expr.__class__ = generic
+    expr.hits = -BACKOFF
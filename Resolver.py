@@ -0,0 +1,158 @@
+from enum import Enum, auto
+from typing import Dict, List
+from ErrorReporter import error_at_token
+import Expr
+import Stmt
+from Token import Token
+
+
+class FunctionType(Enum):
+    NONE = auto()
+    FUNCTION = auto()
+
+
+class Resolver(Expr.Visitor[None], Stmt.Visitor[None]):
+    """
+    Static pass run between parsing and interpreting. Each local variable
+    reference is annotated with its (depth, slot): how many environments to
+    hop outwards, and its index in that environment's values. References
+    left at depth -1 are globals.
+    """
+
+    def __init__(self):
+        # name -> [slot, defined], one dict per local scope
+        self.scopes: List[Dict[str, list]] = []
+        self.current_function = FunctionType.NONE
+
+    def resolve(self, statements: List[Stmt.Stmt]) -> None:
+        for statement in statements:
+            self.resolve_stmt(statement)
+
+    def resolve_stmt(self, stmt: Stmt.Stmt) -> None:
+        stmt.accept(self)
+
+    def resolve_expr(self, expr: Expr.Expr) -> None:
+        expr.accept(self)
+
+    def begin_scope(self) -> None:
+        self.scopes.append({})
+
+    def end_scope(self) -> None:
+        self.scopes.pop()
+
+    def declare(self, name: Token) -> None:
+        if not self.scopes:
+            return
+
+        scope = self.scopes[-1]
+        if name.lexeme in scope:
+            error_at_token(
+                name, "Already a variable with this name in this scope.")
+            return
+
+        scope[name.lexeme] = [len(scope), False]
+
+    def define(self, name: Token) -> None:
+        if not self.scopes:
+            return
+        self.scopes[-1][name.lexeme][1] = True
+
+    def resolve_local(self, expr: Expr.Expr, name: Token) -> None:
+        for depth, scope in enumerate(reversed(self.scopes)):
+            if name.lexeme in scope:
+                expr.depth = depth
+                expr.slot = scope[name.lexeme][0]
+                return
+
+        # Not found, assume it is global.
+        expr.depth = -1
+        expr.slot = -1
+
+    def resolve_function(self, function: Stmt.Function, type: FunctionType) -> None:
+        enclosing_function = self.current_function
+        self.current_function = type
+
+        # Parameters and body share one scope, matching LoxFunction.call
+        self.begin_scope()
+        for param in function.params:
+            self.declare(param)
+            self.define(param)
+        self.resolve(function.body)
+        self.end_scope()
+
+        self.current_function = enclosing_function
+
+    def visit_block_stmt(self, stmt: Stmt.Block) -> None:
+        self.begin_scope()
+        self.resolve(stmt.statements)
+        self.end_scope()
+
+    def visit_expression_stmt(self, stmt: Stmt.Expression) -> None:
+        self.resolve_expr(stmt.expression)
+
+    def visit_function_stmt(self, stmt: Stmt.Function) -> None:
+        # Define eagerly so the function can refer to itself recursively.
+        self.declare(stmt.name)
+        self.define(stmt.name)
+        self.resolve_function(stmt, FunctionType.FUNCTION)
+
+    def visit_if_stmt(self, stmt: Stmt.If) -> None:
+        self.resolve_expr(stmt.condition)
+        self.resolve_stmt(stmt.thenBranch)
+        if stmt.elseBranch is not None:
+            self.resolve_stmt(stmt.elseBranch)
+
+    def visit_print_stmt(self, stmt: Stmt.Print) -> None:
+        self.resolve_expr(stmt.expresssion)
+
+    def visit_return_stmt(self, stmt: Stmt.Return) -> None:
+        if self.current_function == FunctionType.NONE:
+            error_at_token(stmt.keyword, "Can't return from top-level code.")
+
+        if stmt.value is not None:
+            self.resolve_expr(stmt.value)
+
+    def visit_var_stmt(self, stmt: Stmt.Var) -> None:
+        self.declare(stmt.name)
+        if stmt.initializer is not None:
+            self.resolve_expr(stmt.initializer)
+        self.define(stmt.name)
+
+    def visit_while_stmt(self, stmt: Stmt.While) -> None:
+        self.resolve_expr(stmt.condition)
+        self.resolve_stmt(stmt.body)
+
+    def visit_assign_expr(self, expr: Expr.Assign) -> None:
+        self.resolve_expr(expr.value)
+        self.resolve_local(expr, expr.name)
+
+    def visit_binary_expr(self, expr: Expr.Binary) -> None:
+        self.resolve_expr(expr.left)
+        self.resolve_expr(expr.right)
+
+    def visit_call_expr(self, expr: Expr.Call) -> None:
+        self.resolve_expr(expr.callee)
+        for argument in expr.arguments:
+            self.resolve_expr(argument)
+
+    def visit_grouping_expr(self, expr: Expr.Grouping) -> None:
+        self.resolve_expr(expr.expression)
+
+    def visit_literal_expr(self, expr: Expr.Literal) -> None:
+        return
+
+    def visit_logical_expr(self, expr: Expr.Logical) -> None:
+        self.resolve_expr(expr.left)
+        self.resolve_expr(expr.right)
+
+    def visit_unary_expr(self, expr: Expr.Unary) -> None:
+        self.resolve_expr(expr.right)
+
+    def visit_variable_expr(self, expr: Expr.Variable) -> None:
+        if self.scopes:
+            entry = self.scopes[-1].get(expr.name.lexeme)
+            if entry is not None and not entry[1]:
+                error_at_token(
+                    expr.name, "Can't read local variable in its own initializer.")
+
+        self.resolve_local(expr, expr.name)
@@ -1,3 +1,9 @@
 class Return(Exception):
     def __init__(self, value: object):
         self.value = value
+
+
+# What Interpreter statement visits return once a `return` statement has
+# run, so it can unwind to the enclosing call without raising; the value
+# itself is left in Interpreter.return_value.
+RETURNING = object()
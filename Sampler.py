@@ -0,0 +1,134 @@
+from collections import Counter
+import signal
+import time
+from types import CodeType, FrameType
+from typing import Dict, Optional, Set, TextIO
+from Interpreter import Interpreter
+from LoxFunction import LoxFunction
+
+# Attribute holding a node's token, for the node classes that have one.
+TOKEN_FIELDS = ('operator', 'name', 'paren', 'keyword')
+
+# Largest share of the sampling interval the sampler may spend taking a
+# sample, on average; past it the interval is doubled.
+MAX_OVERHEAD = 0.05
+
+
+def node_line(node: object) -> Optional[int]:
+    for field in TOKEN_FIELDS:
+        token = getattr(node, field, None)
+        if token is not None:
+            return token.line
+    return None
+
+
+def subclasses(cls: type):
+    yield cls
+    for subclass in cls.__subclasses__():
+        yield from subclasses(subclass)
+
+
+class Sampler:
+    """
+    Statistical line profiler for the tree-walker. A SIGPROF timer
+    interrupts the program every `interval` seconds of CPU time and the
+    handler reads the Lox call stack, and the line each Lox function is
+    on, off the Python stack: visit methods hold the node they evaluate,
+    and LoxFunction.call the function it runs. Nothing is added to the
+    interpreter itself, so the program runs at full speed between
+    samples.
+
+    The time the handler takes is measured; if samples cost more than
+    MAX_OVERHEAD of the interval on average, the interval is doubled,
+    which bounds the slowdown for programs with very deep stacks.
+
+    Samples are written in the folded-stack format of flamegraph.pl and
+    compatible tools: one `frame;frame;... count` line per distinct
+    stack, outermost first, each frame `function:line`.
+    """
+
+    def __init__(self, interpreter: Interpreter, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.overhead = 0.0
+
+        # The code of every visit method, with the name of its node
+        # parameter, and of every LoxFunction.call.
+        self.node_codes: Dict[CodeType, str] = {}
+        for cls in type(interpreter).__mro__:
+            for attribute in vars(cls).values():
+                code = getattr(attribute, '__code__', None)
+                if code is not None and code.co_argcount >= 2 \
+                        and code.co_varnames[1] in ('expr', 'stmt'):
+                    self.node_codes[code] = code.co_varnames[1]
+        self.call_codes: Set[CodeType] = {
+            cls.call.__code__ for cls in subclasses(LoxFunction)
+            if 'function' in cls.call.__code__.co_varnames
+        }
+
+    def start(self) -> None:
+        signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def sample(self, signum: int, frame: Optional[FrameType]) -> None:
+        start = time.perf_counter()
+        try:
+            self.stacks[self.stack(frame)] += 1
+        except Exception:
+            # The handler runs inside the Lox program, so anything it
+            # raised would surface there as a runtime error.
+            self.stacks['[unreadable]'] += 1
+        self.samples += 1
+
+        self.overhead += time.perf_counter() - start
+        if self.overhead > self.samples * self.interval * MAX_OVERHEAD:
+            self.interval *= 2
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stack(self, frame: Optional[FrameType]) -> str:
+        """The folded Lox stack that `frame` is part of."""
+        node_codes = self.node_codes
+        call_codes = self.call_codes
+
+        # Walk outwards; the first node found above each LoxFunction.call
+        # is the one that function is running.
+        frames = []
+        line = None
+        found = False
+        while frame is not None:
+            code = frame.f_code
+            if code in node_codes:
+                found = True
+                if line is None:
+                    line = node_line(frame.f_locals.get(node_codes[code]))
+            elif code in call_codes:
+                found = True
+                # A call interrupted before its first line has no
+                # `function` yet; it is about to run `self`.
+                variables = frame.f_locals
+                function = variables.get('function') or variables.get('self')
+                if function is not None:
+                    frames.append(f"{function.declaration.name.lexeme}:{line or '?'}")
+                line = None
+            frame = frame.f_back
+
+        if not found:
+            # Scanning, parsing, resolving or writing output.
+            return '[outside Lox code]'
+        frames.append(f"<script>:{line or '?'}")
+        return ';'.join(reversed(frames))
+
+    def write_folded(self, out: TextIO) -> None:
+        for stack, count in sorted(self.stacks.items()):
+            out.write(f"{stack} {count}\n")
+
+    def summary(self, out: TextIO, elapsed: float) -> None:
+        share = self.overhead / elapsed if elapsed else 0.0
+        print(f"{self.samples} samples, final interval {self.interval * 1000:g} ms; "
+              f"sampler overhead {self.overhead * 1000:.1f} ms "
+              f"({share:.1%} of {elapsed:.3f} s)", file=out)
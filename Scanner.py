@@ -1,7 +1,8 @@
-from typing import List
+from typing import Iterable, Iterator, List
 from Token import Token
 from TokenType import TokenType
 from ErrorReporter import error_at_line
+from Numbers import number_literal
 
 
 class Scanner:
@@ -39,6 +40,17 @@ class Scanner:
 
         return self.tokens
 
+    def scanIter(self) -> Iterator[Token]:
+        """Like scanTokens, but yields each token as soon as it is scanned."""
+        while not self.isAtEnd():
+            self.start = self.current
+            self.scanToken()
+            if self.tokens:
+                yield from self.tokens
+                self.tokens.clear()
+
+        yield Token(TokenType.EOF, "", None, self.line)
+
     def isAtEnd(self) -> bool:
         return self.current >= len(self.source)
 
@@ -136,7 +148,7 @@ class Scanner:
         while self.peek().isdigit():
             self.advance()
 
-        self.addToken(TokenType.NUMBER, float(
+        self.addToken(TokenType.NUMBER, number_literal(
             self.source[self.start: self.current]))
 
     def string(self) -> None:
@@ -191,3 +203,39 @@ class Scanner:
 
     def isAlphaNumeric(self, c: str) -> bool:
         return c.isalnum() or c == '_'
+
+
+class StreamingScanner(Scanner):
+    """
+    Scanner reading its source incrementally from an iterable of chunks,
+    such as the lines of a file object. Only the text of the token being
+    scanned is kept, so memory does not grow with the input size. Use it
+    through scanIter.
+    """
+
+    def __init__(self, chunks: Iterable[str]):
+        super().__init__("")
+        self.chunks = iter(chunks)
+
+    def refill(self) -> bool:
+        """
+        Append the next chunk to the source, dropping the text before the
+        current token. Returns False when the input is exhausted.
+        """
+        for chunk in self.chunks:
+            if chunk:
+                self.source = self.source[self.start:] + chunk
+                self.current -= self.start
+                self.start = 0
+                return True
+        return False
+
+    def isAtEnd(self) -> bool:
+        if self.current < len(self.source):
+            return False
+        return not self.refill()
+
+    def peekNext(self) -> str:
+        if self.current + 1 >= len(self.source) and not self.refill():
+            return '\0'
+        return super().peekNext()
@@ -0,0 +1,160 @@
+from contextlib import contextmanager
+from dataclasses import fields
+import time
+from typing import Dict, Iterator, List, Optional, TextIO
+import Expr
+from Interpreter import Interpreter
+from LoxFunction import LoxFunction, TailCall
+from Profiler import ProfilingInterpreter
+import Stmt
+
+
+class PhaseTime:
+    __slots__ = ('wall', 'cpu', 'count')
+
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.count = 0  # more than 1 when a phase runs per statement
+
+
+class RunStats:
+    """
+    Metrics for running one program: wall and CPU time per phase of
+    Lox.run, and how much work there was. Counts that weren't measured,
+    e.g. tokens on a cache hit or the runtime counters of a backend other
+    than the tree-walker, stay None.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, PhaseTime] = {}
+        self.tokens: Optional[int] = None
+        self.nodes: Optional[int] = None
+        self.statements: Optional[int] = None
+        self.calls: Optional[int] = None
+        self.environments: Optional[int] = None
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the body of a `with` statement as the phase `name`."""
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = PhaseTime()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            phase.wall += time.perf_counter() - wall
+            phase.cpu += time.process_time() - cpu
+            phase.count += 1
+
+    def add_tokens(self, count: int) -> None:
+        self.tokens = (self.tokens or 0) + count
+
+    def add_nodes(self, statements: List[Stmt.Stmt]) -> None:
+        self.nodes = (self.nodes or 0) + count_nodes(statements)
+
+    def collect(self, interpreter: Interpreter) -> None:
+        """Copy the runtime counters from a CountingInterpreter."""
+        if isinstance(interpreter, CountingInterpreter):
+            self.statements = interpreter.statements
+            self.calls = interpreter.calls
+            self.environments = interpreter.environments
+
+    def to_dict(self) -> dict:
+        return {
+            'phases': {name: {'wall': phase.wall, 'cpu': phase.cpu, 'count': phase.count}
+                       for name, phase in self.phases.items()},
+            'tokens': self.tokens,
+            'nodes': self.nodes,
+            'statements': self.statements,
+            'calls': self.calls,
+            'environments': self.environments,
+        }
+
+    def report(self, out: TextIO) -> None:
+        print(f"{'phase':12} {'wall (s)':>10} {'cpu (s)':>10}", file=out)
+        for name, phase in self.phases.items():
+            print(f"{name:12} {phase.wall:>10.4f} {phase.cpu:>10.4f}", file=out)
+        for name in ('tokens', 'nodes', 'statements', 'calls', 'environments'):
+            value = getattr(self, name)
+            print(f"{name:12} {'n/a' if value is None else value:>10}", file=out)
+
+
+def count_nodes(nodes: List[object]) -> int:
+    """Number of Expr and Stmt nodes in `nodes` and the trees below them."""
+    count = 0
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, (Expr.Expr, Stmt.Stmt)):
+            count += 1
+            stack.extend(getattr(node, field.name) for field in fields(node))
+    return count
+
+
+def counted(visit):
+    def visit_counted(self, stmt):
+        self.statements += 1
+        return visit(self, stmt)
+    visit_counted.__name__ = visit.__name__
+    return visit_counted
+
+
+class CountingInterpreter(Interpreter):
+    """
+    The tree-walker, counting the statements it executes, the calls it
+    makes and the environments it allocates: one per block entered and
+    one per Lox call, including each call made in tail position.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statements = 0
+        self.calls = 0
+        self.environments = 0
+
+    def visit_block_stmt(self, stmt: Stmt.Block) -> object:
+        self.statements += 1
+        self.environments += 1
+        return super().visit_block_stmt(stmt)
+
+    def visit_return_stmt(self, stmt: Stmt.Return) -> object:
+        self.statements += 1
+        if type(stmt.value) is Expr.Call:
+            self.calls += 1
+        result = super().visit_return_stmt(stmt)
+        if type(self.return_value) is TailCall:
+            self.environments += 1
+        return result
+
+    def visit_call_expr(self, expr: Expr.Call) -> object:
+        # Interpreter.visit_call_expr without its fast path, which
+        # evaluate_call also takes, so the callee is known before the call.
+        callee, arguments = self.evaluate_call(expr)
+        self.calls += 1
+        if isinstance(callee, LoxFunction):
+            self.environments += 1
+        return callee.call(self, arguments)
+
+
+class CountingProfilingInterpreter(CountingInterpreter, ProfilingInterpreter):
+    """CountingInterpreter over ProfilingInterpreter, for --stats with --profile or --trace."""
+
+
+# The statements CountingInterpreter counts in its own visit methods.
+COUNTED_BY_HAND = {name for name in vars(CountingInterpreter) if name.endswith('_stmt')}
+
+
+def count_statements(counting: type, base: type) -> None:
+    """Count each statement in `counting`, then run `base`'s visit method."""
+    for name in dir(base):
+        if name.startswith('visit_') and name.endswith('_stmt') \
+                and name not in COUNTED_BY_HAND:
+            setattr(counting, name, counted(getattr(base, name)))
+
+
+count_statements(CountingInterpreter, Interpreter)
+count_statements(CountingProfilingInterpreter, ProfilingInterpreter)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Any, TypeVar, Generic
+from typing import List, Any, TypeVar, Generic, Callable, ClassVar
 from abc import ABC, abstractmethod
 from Token import Token
 from Expr import Expr
@@ -8,6 +8,9 @@ R = TypeVar('R')
 
 
 class Stmt(ABC):
+    __slots__ = ()
+    tag: ClassVar[int]
+
     @abstractmethod
     def accept(self, visitor: 'Visitor[R]') -> R:
         pass
@@ -47,24 +50,27 @@ class Visitor(Generic[R], ABC):
         pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Block(Stmt):
+    tag: ClassVar[int] = 0
     statements: List[Stmt]
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_block_stmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Expression(Stmt):
+    tag: ClassVar[int] = 1
     expression: Expr
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_expression_stmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Function(Stmt):
+    tag: ClassVar[int] = 2
     name: Token
     params: List[Token]
     body: List[Stmt]
@@ -73,8 +79,9 @@ class Function(Stmt):
         return visitor.visit_function_stmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class If(Stmt):
+    tag: ClassVar[int] = 3
     condition: Expr
     thenBranch: Stmt
     elseBranch: Stmt
@@ -83,16 +90,18 @@ class If(Stmt):
         return visitor.visit_if_stmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Print(Stmt):
+    tag: ClassVar[int] = 4
     expresssion: Expr
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_print_stmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Return(Stmt):
+    tag: ClassVar[int] = 5
     keyword: Token
     value: Expr
 
@@ -100,8 +109,9 @@ class Return(Stmt):
         return visitor.visit_return_stmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class Var(Stmt):
+    tag: ClassVar[int] = 6
     name: Token
     initializer: Expr
 
@@ -109,10 +119,25 @@ class Var(Stmt):
         return visitor.visit_var_stmt(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class While(Stmt):
+    tag: ClassVar[int] = 7
     condition: Expr
     body: Stmt
 
     def accept(self, visitor: 'Visitor[R]') -> R:
         return visitor.visit_while_stmt(self)
+
+
+def dispatch_table(visitor: 'Visitor[R]') -> List[Callable[[Any], R]]:
+    """Bound visit methods of `visitor`, indexed by node tag."""
+    return [
+        visitor.visit_block_stmt,
+        visitor.visit_expression_stmt,
+        visitor.visit_function_stmt,
+        visitor.visit_if_stmt,
+        visitor.visit_print_stmt,
+        visitor.visit_return_stmt,
+        visitor.visit_var_stmt,
+        visitor.visit_while_stmt,
+    ]
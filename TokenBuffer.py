@@ -0,0 +1,64 @@
+from array import array
+import sys
+from Numbers import number_literal
+from Token import Token
+from TokenType import TokenType
+
+
+# TokenType members indexed by value, to decode the `types` array.
+TYPES = [None] * (max(t.value for t in TokenType) + 1)
+for _type in TokenType:
+    TYPES[_type.value] = _type
+
+IDENTIFIER = TokenType.IDENTIFIER.value
+NUMBER = TokenType.NUMBER.value
+STRING = TokenType.STRING.value
+
+
+class TokenBuffer:
+    """
+    Struct-of-arrays token storage: parallel int arrays hold each token's
+    type, start offset into the source, length and line. Nothing is sliced
+    out of the source while scanning; Token objects (with their lexeme and
+    literal) are only built when the Parser asks for one by index, and
+    identifier lexemes are interned so repeated names share one string.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.types = array('i')
+        self.starts = array('i')
+        self.lengths = array('i')
+        self.lines = array('i')
+
+    def add(self, type: int, start: int, length: int, line: int) -> None:
+        self.types.append(type)
+        self.starts.append(start)
+        self.lengths.append(length)
+        self.lines.append(line)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def typeAt(self, index: int) -> TokenType:
+        return TYPES[self.types[index]]
+
+    def lexeme(self, index: int) -> str:
+        start = self.starts[index]
+        text = self.source[start:start + self.lengths[index]]
+        if self.types[index] == IDENTIFIER:
+            text = sys.intern(text)
+        return text
+
+    def __getitem__(self, index: int) -> Token:
+        type = self.types[index]
+        start = self.starts[index]
+        text = self.source[start:start + self.lengths[index]]
+        literal = None
+        if type == IDENTIFIER:
+            text = sys.intern(text)
+        elif type == NUMBER:
+            literal = number_literal(text)
+        elif type == STRING:
+            literal = text[1:-1]
+        return Token(TYPES[type], text, literal, self.lines[index])
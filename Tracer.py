@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+import json
+import os
+from typing import Iterator, List
+from Profiler import FunctionStats, Profiler
+
+# Events kept in memory before they are written to the trace file.
+DEFAULT_BUFFER_EVENTS = 10_000
+
+
+class Tracer(Profiler):
+    """
+    A Profiler that also writes a timeline of every call it sees, and of
+    the phases of Lox.run, to `path` in the Chrome Trace Event format
+    (a JSON array of begin and end events), which Perfetto and
+    about://tracing open.
+
+    Events are written out every `buffer_events` events, so a long run
+    needs no more memory than that; close() writes the rest and ends the
+    array. Both viewers also read a trace whose array was never closed,
+    e.g. after the process was killed.
+    """
+
+    def __init__(self, path: str, buffer_events: int = DEFAULT_BUFFER_EVENTS):
+        super().__init__()
+        self.file = open(path, 'w')
+        self.file.write('[\n')
+        self.separator = ''  # before the next event
+        self.buffer_events = buffer_events
+        self.events: List[str] = []
+        self.origin = self.clock()
+        # `"pid":..,"tid":..` for every event; Lox runs on a single thread.
+        self.ids = f'"pid":{os.getpid()},"tid":1'
+
+    def event(self, phase: str, name: str, category: str, args: str = '') -> None:
+        timestamp = (self.clock() - self.origin) * 1e6
+        self.events.append(f'{{"name":{name},"cat":"{category}","ph":"{phase}",'
+                           f'"ts":{timestamp:.3f},{self.ids}{args}}}')
+        if len(self.events) >= self.buffer_events:
+            self.flush()
+
+    def enter(self, stats: FunctionStats) -> None:
+        super().enter(stats)
+        category = 'lox' if stats.line else 'native'
+        args = f',"args":{{"line":{stats.line}}}' if stats.line else ''
+        self.event('B', json.dumps(stats.name), category, args)
+
+    def exit(self) -> None:
+        stats = self.stack[-1][0]
+        super().exit()
+        self.event('E', json.dumps(stats.name), 'lox' if stats.line else 'native')
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Trace the body of a `with` statement as a phase called `name`."""
+        name = json.dumps(name)
+        self.event('B', name, 'phase')
+        try:
+            yield
+        finally:
+            self.event('E', name, 'phase')
+
+    def flush(self) -> None:
+        if self.events:
+            self.file.write(self.separator + ',\n'.join(self.events))
+            self.separator = ',\n'
+            self.events.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.write('\n]\n')
+        self.file.close()
@@ -0,0 +1,392 @@
+import math
+from typing import Dict, List, Optional
+import Expr
+from ErrorReporter import nesting_error
+from Interpreter import Interpreter
+from LoxCallable import LoxCallable
+from Numbers import to_float
+import Stmt
+from TokenType import TokenType
+
+
+BINARY_OPS = {
+    TokenType.MINUS: '-',
+    TokenType.SLASH: '/',
+    TokenType.STAR: '*',
+    TokenType.PLUS: '+',
+    TokenType.GREATER: '>',
+    TokenType.GREATER_EQUAL: '>=',
+    TokenType.LESS: '<',
+    TokenType.LESS_EQUAL: '<=',
+    TokenType.EQUAL_EQUAL: '==',
+}
+
+# Operators whose result is always a bool, so Python truthiness already
+# agrees with Lox truthiness.
+BOOLEAN_OPS = {
+    TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS,
+    TokenType.LESS_EQUAL, TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL,
+    TokenType.BANG,
+}
+
+
+class PythonFunction(LoxCallable):
+    def __init__(self, name: str, arity: int, fn):
+        self.name = name
+        self._arity = arity
+        self.fn = fn
+
+    def call(self, interpreter: Interpreter, arguments: List[object]) -> object:
+        return self.fn(*arguments)
+
+    def arity(self) -> int:
+        return self._arity
+
+    def toString(self) -> str:
+        return f"<fn {self.name}>"
+
+
+class Decl:
+    """A local variable, and the Python name it is translated to."""
+    __slots__ = ('pyname', 'level', 'captured')
+
+    def __init__(self, pyname: str, level: int):
+        self.pyname = pyname
+        self.level = level  # function nesting level of the declaration
+        self.captured = False
+
+
+class FunctionInfo:
+    """Captured variables a function needs from enclosing functions."""
+    __slots__ = ('level', 'free')
+
+    def __init__(self, level: int):
+        self.level = level
+        self.free: Dict[Decl, None] = {}  # used as an ordered set
+
+
+class Transpiler(Expr.Visitor[str], Stmt.Visitor[None]):
+    """
+    Translates a resolved AST into the source of a Python function,
+    `_program`. Globals live in the `_G` dict shared with the interpreter,
+    locals become renamed Python locals, and values that have no source
+    form (tokens for error reports, non-finite numbers) are read from the
+    `_K` constants list.
+
+    A local that some nested function refers to is kept in a one-element
+    list (a cell), and every Lox function is built by a factory that takes
+    the cells it needs. That way, like a Lox closure, each function value
+    holds on to the variables as they were when it was declared, even when
+    the declaration runs repeatedly in a loop.
+
+    The tree is walked twice with the same code: the first walk only finds
+    the declarations and which of them are captured, the second writes the
+    source.
+    """
+
+    def __init__(self):
+        self.decls: List[Decl] = []
+        self.functions: List[FunctionInfo] = []
+        self.analysing = True
+
+    def transpile(self, statements: List[Stmt.Stmt]) -> str:
+        self.run_pass(statements)
+        self.analysing = False
+        return self.run_pass(statements)
+
+    def run_pass(self, statements: List[Stmt.Stmt]) -> str:
+        self.lines: List[str] = ["def _program():"]
+        self.indent = 1
+        self.scopes: List[List[Decl]] = []
+        self.function_stack: List[FunctionInfo] = []
+        self.decl_count = 0
+        self.function_count = 0
+        self.temp_count = 0
+        self.constants: List[object] = []
+
+        self.emit_body(statements)
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, line: str) -> None:
+        if not self.analysing:
+            self.lines.append("    " * self.indent + line)
+
+    def emit_body(self, statements: List[Stmt.Stmt], prologue: List[str] = ()) -> None:
+        start = len(self.lines)
+        for line in prologue:
+            self.emit(line)
+        for statement in statements:
+            statement.accept(self)
+        if len(self.lines) == start:
+            self.emit("pass")
+
+    def emit_nested(self, stmt: Stmt.Stmt) -> None:
+        self.indent += 1
+        self.emit_body([stmt])
+        self.indent -= 1
+
+    def constant(self, value: object) -> str:
+        self.constants.append(value)
+        return f"_K[{len(self.constants) - 1}]"
+
+    def temp(self) -> str:
+        self.temp_count += 1
+        return f"_v{self.temp_count}"
+
+    @property
+    def level(self) -> int:
+        return len(self.function_stack)
+
+    def declare(self, name: str) -> Optional[Decl]:
+        """Declare a local in the innermost scope; None means a global."""
+        if not self.scopes:
+            return None
+
+        if self.analysing:
+            decl = Decl(f"{name}_{len(self.decls)}", self.level)
+            self.decls.append(decl)
+        else:
+            decl = self.decls[self.decl_count]
+            self.decl_count += 1
+
+        self.scopes[-1].append(decl)
+        return decl
+
+    def lookup(self, depth: int, slot: int) -> Optional[Decl]:
+        if depth < 0:
+            return None
+
+        decl = self.scopes[-1 - depth][slot]
+        if self.analysing and decl.level < self.level:
+            decl.captured = True
+            for info in self.function_stack:
+                if info.level > decl.level:
+                    info.free[decl] = None
+        return decl
+
+    def bind(self, decl: Optional[Decl], name: str, value: str) -> None:
+        if decl is None:
+            self.emit(f"_define({name!r}, {value})")
+        elif decl.captured:
+            self.emit(f"{decl.pyname} = [{value}]")
+        else:
+            self.emit(f"{decl.pyname} = {value}")
+
+    def truthy(self, expr: Expr.Expr) -> str:
+        """Python condition that holds when `expr` is truthy in Lox."""
+        code = expr.accept(self)
+        if isinstance(expr, (Expr.Binary, Expr.Unary)) and expr.operator.type in BOOLEAN_OPS:
+            return code
+        temp = self.temp()
+        return f"(({temp} := {code}) is not None and {temp} is not False)"
+
+    def visit_block_stmt(self, stmt: Stmt.Block) -> None:
+        # Scoping is handled by renaming, so a block needs no Python construct.
+        self.scopes.append([])
+        for statement in stmt.statements:
+            statement.accept(self)
+        self.scopes.pop()
+
+    def visit_expression_stmt(self, stmt: Stmt.Expression) -> None:
+        expr = stmt.expression
+        if isinstance(expr, Expr.Assign) and expr.depth >= 0:
+            decl = self.lookup(expr.depth, expr.slot)
+            value = expr.value.accept(self)
+            if decl.captured:
+                self.emit(f"{decl.pyname}[0] = {value}")
+            else:
+                self.emit(f"{decl.pyname} = {value}")
+            return
+
+        self.emit(expr.accept(self))
+
+    def visit_function_stmt(self, stmt: Stmt.Function) -> None:
+        name = stmt.name.lexeme
+        decl = self.declare(name)
+
+        if self.analysing:
+            info = FunctionInfo(self.level + 1)
+            self.functions.append(info)
+        else:
+            info = self.functions[self.function_count]
+        self.function_count += 1
+        number = self.function_count
+
+        self.function_stack.append(info)
+        self.scopes.append([])
+        params = [self.declare(param.lexeme) for param in stmt.params]
+        free = ", ".join(cell.pyname for cell in info.free)
+        self.emit(f"def _make{number}({free}):")
+        self.indent += 1
+        self.emit(f"def _fn{number}_{name}({', '.join(p.pyname for p in params)}):")
+        self.indent += 1
+        self.emit_body(stmt.body, [f"{p.pyname} = [{p.pyname}]"
+                                   for p in params if p.captured])
+        self.indent -= 1
+        self.emit(f"return _fn{number}_{name}")
+        self.indent -= 1
+        self.scopes.pop()
+        self.function_stack.pop()
+
+        value = f"_Fn({name!r}, {len(params)}, _make{number}({free}))"
+        if decl is not None and decl.captured:
+            # The function may refer to itself, so the cell must exist first.
+            self.emit(f"{decl.pyname} = [None]")
+            self.emit(f"{decl.pyname}[0] = {value}")
+        else:
+            self.bind(decl, name, value)
+
+    def visit_if_stmt(self, stmt: Stmt.If) -> None:
+        self.emit(f"if {self.truthy(stmt.condition)}:")
+        self.emit_nested(stmt.thenBranch)
+        if stmt.elseBranch is not None:
+            self.emit("else:")
+            self.emit_nested(stmt.elseBranch)
+
+    def visit_print_stmt(self, stmt: Stmt.Print) -> None:
+        self.emit(f"_print(_stringify({stmt.expresssion.accept(self)}))")
+
+    def visit_return_stmt(self, stmt: Stmt.Return) -> None:
+        if stmt.value is None:
+            self.emit("return None")
+        else:
+            self.emit(f"return {stmt.value.accept(self)}")
+
+    def visit_var_stmt(self, stmt: Stmt.Var) -> None:
+        value = "None"
+        if stmt.initializer is not None:
+            value = stmt.initializer.accept(self)
+        self.bind(self.declare(stmt.name.lexeme), stmt.name.lexeme, value)
+
+    def visit_while_stmt(self, stmt: Stmt.While) -> None:
+        self.emit(f"while {self.truthy(stmt.condition)}:")
+        self.emit_nested(stmt.body)
+
+    def visit_assign_expr(self, expr: Expr.Assign) -> str:
+        value = expr.value.accept(self)
+        decl = self.lookup(expr.depth, expr.slot)
+        if decl is None:
+            return f"_set_global({expr.name.lexeme!r}, {value})"
+        if decl.captured:
+            return f"_store({decl.pyname}, {value})"
+        return f"({decl.pyname} := {value})"
+
+    def visit_binary_expr(self, expr: Expr.Binary) -> str:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        if expr.operator.type == TokenType.BANG_EQUAL:
+            return f"(not {left} == {right})"
+        return f"({left} {BINARY_OPS[expr.operator.type]} {right})"
+
+    def visit_call_expr(self, expr: Expr.Call) -> str:
+        callee = expr.callee.accept(self)
+        arguments = "".join(f", {argument.accept(self)}"
+                            for argument in expr.arguments)
+        return f"_call({callee}, {self.constant(expr.paren)}{arguments})"
+
+    def visit_grouping_expr(self, expr: Expr.Grouping) -> str:
+        return expr.expression.accept(self)
+
+    def visit_literal_expr(self, expr: Expr.Literal) -> str:
+        value = to_float(expr.value)
+        if isinstance(value, float) and not math.isfinite(value):
+            return self.constant(value)
+        return repr(value)
+
+    def visit_logical_expr(self, expr: Expr.Logical) -> str:
+        left = expr.left.accept(self)
+        right = expr.right.accept(self)
+        temp = self.temp()
+        test = f"(({temp} := {left}) is not None and {temp} is not False)"
+        if expr.operator.type == TokenType.OR:
+            return f"({temp} if {test} else {right})"
+        return f"({right} if {test} else {temp})"
+
+    def visit_unary_expr(self, expr: Expr.Unary) -> str:
+        if expr.operator.type == TokenType.MINUS:
+            return f"(-{expr.right.accept(self)})"
+        return f"(not {self.truthy(expr.right)})"
+
+    def visit_variable_expr(self, expr: Expr.Variable) -> str:
+        decl = self.lookup(expr.depth, expr.slot)
+        if decl is None:
+            return f"_G[{expr.name.lexeme!r}]"
+        if decl.captured:
+            return f"{decl.pyname}[0]"
+        return decl.pyname
+
+
+class PythonInterpreter(Interpreter):
+    """
+    Runs programs by transpiling them to Python and handing the result to
+    CPython's own compile() and exec(). Programs Python refuses to compile
+    (such as loops nested past its static block limit) fall back to the
+    tree-walker.
+    """
+
+    def interpret(self, statements: List[Stmt.Stmt]) -> None:
+        transpiler = Transpiler()
+        try:
+            source = transpiler.transpile(statements)
+        except RecursionError:
+            nesting_error(statements)
+            return
+        try:
+            code = compile(source, "<lox>", "exec")
+        except (SyntaxError, RecursionError, MemoryError):
+            return super().interpret(statements)
+
+        namespace = self.runtime()
+        namespace['_K'] = transpiler.constants
+        exec(code, namespace)
+        try:
+            namespace['_program']()
+        except KeyError as e:
+            # Only global lookups index a dict in the generated code.
+            self.runtime_error(RuntimeError(f"Undefined variable '{e.args[0]}'."))
+        except RecursionError:
+            self.runtime_error(RuntimeError("Stack overflow."))
+        except Exception as e:
+            self.runtime_error(e)
+        finally:
+            self.output.flush()
+
+    def runtime(self) -> dict:
+        """The helpers generated code refers to."""
+        globals = self.globals.values
+        define = self.globals.define
+
+        def call(callee, paren, *arguments):
+            if type(callee) is PythonFunction and callee._arity == len(arguments):
+                return callee.fn(*arguments)
+
+            if not isinstance(callee, LoxCallable):
+                raise RuntimeError(
+                    paren, "Can only call functions and classes.")
+
+            if len(arguments) != callee.arity():
+                raise RuntimeError(
+                    paren, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
+
+            return callee.call(self, list(arguments))
+
+        def set_global(name, value):
+            if name not in globals:
+                raise RuntimeError(f"Undefined variable '{name}'.")
+            define(name, value)
+            return value
+
+        def store(cell, value):
+            cell[0] = value
+            return value
+
+        return {
+            '_G': globals,
+            '_Fn': PythonFunction,
+            '_call': call,
+            '_define': define,
+            '_set_global': set_global,
+            '_store': store,
+            '_print': self.output.write_line,
+            '_stringify': self.stringify,
+        }
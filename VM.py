@@ -0,0 +1,249 @@
+from typing import List, Optional
+from Chunk import Chunk, FunctionProto, OpCode
+from Compiler import Compiler
+from Environment import Environment
+from ErrorReporter import nesting_error
+from Interpreter import Interpreter
+from LoxCallable import LoxCallable
+from Output import Sink
+import Stmt
+
+
+# Plain int copies of the opcodes: comparing against enum members in the
+# dispatch loop costs an attribute lookup per test.
+CONSTANT = int(OpCode.CONSTANT)
+NIL = int(OpCode.NIL)
+TRUE = int(OpCode.TRUE)
+FALSE = int(OpCode.FALSE)
+POP = int(OpCode.POP)
+GET_LOCAL = int(OpCode.GET_LOCAL)
+SET_LOCAL = int(OpCode.SET_LOCAL)
+DEFINE_LOCAL = int(OpCode.DEFINE_LOCAL)
+GET_GLOBAL = int(OpCode.GET_GLOBAL)
+SET_GLOBAL = int(OpCode.SET_GLOBAL)
+DEFINE_GLOBAL = int(OpCode.DEFINE_GLOBAL)
+EQUAL = int(OpCode.EQUAL)
+NOT_EQUAL = int(OpCode.NOT_EQUAL)
+GREATER = int(OpCode.GREATER)
+GREATER_EQUAL = int(OpCode.GREATER_EQUAL)
+LESS = int(OpCode.LESS)
+LESS_EQUAL = int(OpCode.LESS_EQUAL)
+ADD = int(OpCode.ADD)
+SUBTRACT = int(OpCode.SUBTRACT)
+MULTIPLY = int(OpCode.MULTIPLY)
+DIVIDE = int(OpCode.DIVIDE)
+NOT = int(OpCode.NOT)
+NEGATE = int(OpCode.NEGATE)
+PRINT = int(OpCode.PRINT)
+JUMP = int(OpCode.JUMP)
+JUMP_IF_FALSE = int(OpCode.JUMP_IF_FALSE)
+LOOP = int(OpCode.LOOP)
+PUSH_ENV = int(OpCode.PUSH_ENV)
+POP_ENV = int(OpCode.POP_ENV)
+FUNCTION = int(OpCode.FUNCTION)
+CALL = int(OpCode.CALL)
+RETURN = int(OpCode.RETURN)
+
+# Default limit on nested Lox calls. Frames live on the VM's own stack,
+# not Python's, so this is about bounding memory, not the C stack.
+MAX_DEPTH = 100_000
+
+
+class VMFunction(LoxCallable):
+    """A FunctionProto paired with the environment it was declared in."""
+
+    def __init__(self, proto: FunctionProto, closure):
+        self.proto = proto
+        self.closure = closure
+
+    def call(self, interpreter: 'VM', arguments: List[object]) -> object:
+        return interpreter.run(self.proto.chunk,
+                               Environment(enclosing=self.closure, values=arguments))
+
+    def arity(self) -> int:
+        return self.proto.arity
+
+    def toString(self) -> str:
+        return f"<fn {self.proto.name}>"
+
+
+class VM(Interpreter):
+    """
+    Bytecode backend. Statements are compiled once by the Compiler and then
+    run in a single dispatch loop. Lox calls push a frame onto an explicit
+    frame stack instead of recursing into Python, so recursion depth is
+    limited only by `max_depth`; going deeper is a "Stack overflow."
+    runtime error.
+    """
+
+    def __init__(self, max_depth: int = MAX_DEPTH, output: Optional[Sink] = None):
+        super().__init__(output)
+        self.max_depth = max_depth
+
+    def interpret(self, statements: List[Stmt.Stmt]) -> None:
+        try:
+            chunk = Compiler().compile(statements)
+        except RecursionError:
+            nesting_error(statements)
+            return
+        try:
+            self.run(chunk, self.globals)
+        except Exception as e:
+            self.runtime_error(e)
+        finally:
+            self.output.flush()
+
+    def run(self, chunk: Chunk, environment) -> object:
+        code = chunk.code
+        constants = chunk.constants
+        ip = 0
+        env = environment
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        frames = []
+        max_depth = self.max_depth
+        globals = self.globals.values
+        write_line = self.output.write_line
+
+        while True:
+            op = code[ip]
+            ip += 1
+
+            if op == GET_LOCAL:
+                depth = code[ip]
+                e = env
+                while depth:
+                    e = e.enclosing
+                    depth -= 1
+                push(e.values[code[ip + 1]])
+                ip += 2
+            elif op == CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == GET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                try:
+                    push(globals[name])
+                except KeyError:
+                    raise RuntimeError(f"Undefined variable '{name}'.")
+            elif op == POP:
+                pop()
+            elif op == JUMP_IF_FALSE:
+                value = stack[-1]
+                if value is None or value is False:
+                    ip = code[ip]
+                else:
+                    ip += 1
+            elif op == JUMP or op == LOOP:
+                ip = code[ip]
+            elif op == ADD:
+                right = pop()
+                stack[-1] = stack[-1] + right
+            elif op == SUBTRACT:
+                right = pop()
+                stack[-1] = stack[-1] - right
+            elif op == LESS:
+                right = pop()
+                stack[-1] = stack[-1] < right
+            elif op == SET_LOCAL:
+                depth = code[ip]
+                e = env
+                while depth:
+                    e = e.enclosing
+                    depth -= 1
+                e.values[code[ip + 1]] = stack[-1]
+                ip += 2
+            elif op == CALL:
+                argc = code[ip]
+                paren = constants[code[ip + 1]]
+                ip += 2
+                callee = stack[-argc - 1]
+                arguments = stack[len(stack) - argc:]
+                del stack[len(stack) - argc - 1:]
+
+                if not isinstance(callee, LoxCallable):
+                    raise RuntimeError(
+                        paren, "Can only call functions and classes.")
+                if argc != callee.arity():
+                    raise RuntimeError(
+                        paren, f"Expected {callee.arity()} arguments but got {argc}.")
+
+                if isinstance(callee, VMFunction):
+                    if len(frames) >= max_depth:
+                        raise RuntimeError("Stack overflow.")
+                    frames.append((code, constants, ip, env, stack))
+                    chunk = callee.proto.chunk
+                    code = chunk.code
+                    constants = chunk.constants
+                    ip = 0
+                    env = Environment(enclosing=callee.closure,
+                                      values=arguments)
+                    stack = []
+                    push = stack.append
+                    pop = stack.pop
+                else:
+                    push(callee.call(self, arguments))
+            elif op == RETURN:
+                result = pop()
+                if not frames:
+                    return result
+                code, constants, ip, env, stack = frames.pop()
+                push = stack.append
+                pop = stack.pop
+                push(result)
+            elif op == NIL:
+                push(None)
+            elif op == TRUE:
+                push(True)
+            elif op == FALSE:
+                push(False)
+            elif op == DEFINE_LOCAL:
+                env.values.append(pop())
+            elif op == SET_GLOBAL:
+                name = constants[code[ip]]
+                ip += 1
+                if name not in globals:
+                    raise RuntimeError(f"Undefined variable '{name}'.")
+                globals[name] = stack[-1]
+            elif op == DEFINE_GLOBAL:
+                globals[constants[code[ip]]] = pop()
+                ip += 1
+            elif op == EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] == right
+            elif op == NOT_EQUAL:
+                right = pop()
+                stack[-1] = not stack[-1] == right
+            elif op == GREATER:
+                right = pop()
+                stack[-1] = stack[-1] > right
+            elif op == GREATER_EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] >= right
+            elif op == LESS_EQUAL:
+                right = pop()
+                stack[-1] = stack[-1] <= right
+            elif op == MULTIPLY:
+                right = pop()
+                stack[-1] = stack[-1] * right
+            elif op == DIVIDE:
+                right = pop()
+                stack[-1] = stack[-1] / right
+            elif op == NOT:
+                value = stack[-1]
+                stack[-1] = value is None or value is False
+            elif op == NEGATE:
+                stack[-1] = -stack[-1]
+            elif op == PRINT:
+                write_line(self.stringify(pop()))
+            elif op == PUSH_ENV:
+                env = Environment(enclosing=env)
+            elif op == POP_ENV:
+                env = env.enclosing
+            elif op == FUNCTION:
+                push(VMFunction(constants[code[ip]], env))
+                ip += 1
+            else:
+                raise RuntimeError(f"Unknown opcode {op}.")
@@ -0,0 +1,162 @@
+"""
+Memory-per-node and dispatch-cost comparison between the plain and the
+compact (slotted, tagged) AST modules produced by GenerateAst, plus the
+cost of tag-table dispatch inside the real Interpreter.
+
+Usage: python benchmarks/ast_nodes.py [node count]
+"""
+import gc
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from GenerateAst import define_ast  # noqa: E402
+import Expr  # noqa: E402
+from Interpreter import Interpreter  # noqa: E402
+import Lox  # noqa: E402
+from Output import MemorySink  # noqa: E402
+import Stmt  # noqa: E402
+from Token import Token  # noqa: E402
+from TokenType import TokenType  # noqa: E402
+
+EXPR_TYPES = [
+    "Binary   : Expr left, Token operator, Expr right",
+    "Literal  : Any value",
+]
+
+
+def load_expr_module(compact: bool):
+    directory = tempfile.mkdtemp()
+    define_ast(directory, "Expr", EXPR_TYPES, compact)
+    name = f"Expr_{'compact' if compact else 'plain'}"
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(directory, "Expr.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build(module, count: int):
+    """A left-leaning chain of `count` Binary nodes over Literal leaves."""
+    plus = Token(TokenType.PLUS, "+", None, 1)
+    tree = module.Literal(0.0)
+    for i in range(count):
+        tree = module.Binary(tree, plus, module.Literal(float(i)))
+    return tree
+
+
+class Counter:
+    """Minimal visitor, so the numbers are dominated by dispatch."""
+
+    def visit_binary_expr(self, expr):
+        stack = self.stack
+        stack.append(expr.left)
+        stack.append(expr.right)
+
+    def visit_literal_expr(self, expr):
+        self.count += 1
+
+
+def walk_accept(tree) -> int:
+    counter = Counter()
+    counter.count = 0
+    counter.stack = stack = [tree]
+    while stack:
+        stack.pop().accept(counter)
+    return counter.count
+
+
+def walk_table(module, tree) -> int:
+    counter = Counter()
+    counter.count = 0
+    counter.stack = stack = [tree]
+    table = module.dispatch_table(counter)
+    while stack:
+        node = stack.pop()
+        table[node.tag](node)
+    return counter.count
+
+
+class TableInterpreter(Interpreter):
+    """Interpreter dispatching through the generated tag tables."""
+
+    def __init__(self, output=None):
+        super().__init__(output)
+        self.expr_dispatch = Expr.dispatch_table(self)
+        self.stmt_dispatch = Stmt.dispatch_table(self)
+
+    def evaluate(self, expr):
+        return self.expr_dispatch[expr.tag](expr)
+
+    def execute(self, stmt):
+        return self.stmt_dispatch[stmt.tag](stmt)
+
+
+PROGRAM = """
+fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+print fib(20);
+var i = 0;
+while (i < 100000) i = i + 1;
+print i;
+"""
+
+# What PROGRAM prints; a run printing anything else isn't timed.
+EXPECTED = "6765\n100000\n"
+
+
+def run_program(interpreter_class) -> None:
+    output = MemorySink()
+    Lox.interpreter = interpreter_class(output)
+    Lox.run(PROGRAM)
+    if output.getvalue() != EXPECTED:
+        raise RuntimeError(f"{interpreter_class.__name__} printed "
+                           f"{output.getvalue()!r} instead of {EXPECTED!r}")
+
+
+def main(count: int):
+    results = {}
+    for compact in (False, True):
+        module = load_expr_module(compact)
+
+        tracemalloc.start()
+        tree = build(module, count)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        nodes = 2 * count + 1
+
+        timings = {"accept": min(timed(walk_accept, tree) for _ in range(5))}
+        if compact:
+            timings["table"] = min(timed(walk_table, module, tree)
+                                   for _ in range(5))
+
+        results["compact" if compact else "plain"] = (size / nodes, timings)
+        del tree
+
+    print(f"{2 * count + 1} nodes")
+    for mode, (per_node, timings) in results.items():
+        dispatch = ", ".join(f"{name} {seconds / (2 * count + 1) * 1e9:.0f} ns/node"
+                             for name, seconds in timings.items())
+        print(f"{mode:8} {per_node:6.1f} bytes/node   {dispatch}")
+
+    for interpreter_class in (Interpreter, TableInterpreter):
+        seconds = min(timed(run_program, interpreter_class) for _ in range(5))
+        print(f"{interpreter_class.__name__:16} {seconds:.3f}s on fib(20) + 100k loop")
+
+
+def timed(function, *args) -> float:
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
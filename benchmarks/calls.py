@@ -0,0 +1,121 @@
+"""
+Per-call overhead of the tree-walker: the current call path against the
+original one (evaluate the callee, append each argument, ABC isinstance
+check, arity() twice, keyword-argument call, body run through
+executeBlock), for Lox functions and a native one.
+
+Usage: python benchmarks/calls.py [iterations]
+"""
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import Expr  # noqa: E402
+from Interpreter import Interpreter  # noqa: E402
+from Environment import Environment  # noqa: E402
+from LoxCallable import LoxCallable  # noqa: E402
+from LoxFunction import LoxFunction  # noqa: E402
+import Lox  # noqa: E402
+from Return import RETURNING  # noqa: E402
+import Stmt  # noqa: E402
+
+
+class BaselineFunction(LoxFunction):
+    def call(self, interpreter, arguments):
+        environment = Environment(enclosing=self.closure, values=arguments)
+
+        if interpreter.executeBlock(
+                statements=self.declaration.body, environment=environment) is RETURNING:
+            value = interpreter.return_value
+            interpreter.return_value = None
+            return value
+        return None
+
+    def arity(self) -> int:
+        return len(self.declaration.params)
+
+
+class BaselineInterpreter(Interpreter):
+    """Interpreter with the call path as it was before the call-site cache."""
+
+    def visit_call_expr(self, expr: Expr.Call) -> object:
+        callee = self.evaluate(expr.callee)
+        arguments = []
+        for arg in expr.arguments:
+            arguments.append(self.evaluate(arg))
+
+        if not isinstance(callee, LoxCallable):
+            raise RuntimeError(
+                expr.paren, "Can only call functions and classes.")
+
+        func = callee
+
+        if len(arguments) != func.arity():
+            raise RuntimeError(
+                expr.paren, f"Expected {func.arity()} arguments but got {len(arguments)}.")
+
+        return func.call(interpreter=self, arguments=arguments)
+
+    def visit_function_stmt(self, stmt: Stmt.Function):
+        self.declare(stmt.name.lexeme, BaselineFunction(stmt, self.environment))
+
+
+LOOP = """
+fun f0() {{ return nil; }}
+fun f2(a, b) {{ return nil; }}
+fun run() {{
+  for (var i = 0; i < {iterations}; i = i + 1) {{ {body} }}
+}}
+run();
+"""
+
+CASES = {
+    "lox, 0 args": "f0();",
+    "lox, 2 args": "f2(i, i);",
+    "native clock": "clock();",
+}
+
+
+def run_program(interpreter_class, source: str) -> None:
+    Lox.interpreter = interpreter_class()
+    Lox.run(source)
+
+
+def main(iterations: int, repeat: int = 7):
+    classes = (BaselineInterpreter, Interpreter)
+    sources = {"empty loop": LOOP.format(iterations=iterations, body="")}
+    for case, body in CASES.items():
+        sources[case] = LOOP.format(iterations=iterations, body=body)
+
+    # Interleaved, so a noisy stretch of the run affects both versions.
+    best = {}
+    for _ in range(repeat):
+        for interpreter_class in classes:
+            for case, source in sources.items():
+                seconds = timed(run_program, interpreter_class, source)
+                key = (interpreter_class, case)
+                best[key] = min(best.get(key, seconds), seconds)
+
+    for interpreter_class in classes:
+        loop = best[interpreter_class, "empty loop"]
+        for case in CASES:
+            per_call = (best[interpreter_class, case] - loop) / iterations
+            print(f"{interpreter_class.__name__:20} {case:13} "
+                  f"{per_call * 1e9:6.0f} ns/call")
+
+
+def timed(function, *args) -> float:
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
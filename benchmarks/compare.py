@@ -0,0 +1,251 @@
+"""
+Tracks benchmarks/run.py results over time in a local history file and
+catches regressions.
+
+  record RESULTS   append a run to the history, with the machine it was
+                   recorded on
+  check RESULTS    compare a run with a baseline from the history; exits
+                   with status 1 if a benchmark got significantly slower
+                   by more than --threshold
+  trend            print each benchmark's median across recent runs
+
+Only runs from the same machine, Python and backend are compared, and
+check never uses the run it is checking as its own baseline. A
+benchmark whose source changed since the baseline isn't compared. A
+slowdown is significant if a one-sided permutation test on the two
+runs' times gives p < --alpha. With few times the test can't get there:
+at the default alpha of 0.05 both runs need a --repeat of at least 4.
+
+Usage: python benchmarks/compare.py record results.json
+       python benchmarks/compare.py check results.json [--baseline REV]
+       python benchmarks/compare.py trend [--last N] [--backend B] [--python P]
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+from typing import List, Optional
+
+HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.jsonl')
+
+# Beyond this many ways of splitting the times, the permutation test
+# samples splits instead of trying them all.
+EXACT_LIMIT = 20_000
+SAMPLES = 10_000
+
+
+def machine_fingerprint() -> str:
+    """
+    Short hash identifying this machine's hardware and OS. The hostname
+    is left out, so that CI containers, which get a new one on every
+    run, can still find their baselines.
+    """
+    parts = (platform.machine(), platform.processor(),
+             platform.system(), platform.release(), str(os.cpu_count()))
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()[:16]
+
+
+def read_history(path: str) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def read_results(path: str) -> dict:
+    with open(path) as f:
+        results = json.load(f)
+    results.setdefault('machine', machine_fingerprint())
+    return results
+
+
+def comparable(a: dict, b: dict) -> bool:
+    return all(a.get(key) == b.get(key) for key in ('machine', 'python', 'backend'))
+
+
+def slower_p_value(baseline: List[float], current: List[float]) -> float:
+    """
+    One-sided permutation test: the chance of the current run's mean time
+    exceeding the baseline's by as much as it does if both sets of times
+    came from the same distribution.
+    """
+    observed = statistics.fmean(current) - statistics.fmean(baseline)
+    pooled = baseline + current
+    size = len(current)
+    total = sum(pooled)
+
+    def difference(indices) -> float:
+        chosen = sum(pooled[i] for i in indices)
+        return chosen / size - (total - chosen) / len(baseline)
+
+    splits = itertools.combinations(range(len(pooled)), size)
+    count = math.comb(len(pooled), size)
+    if count > EXACT_LIMIT:
+        rng = random.Random(0)  # the same answer every time for the same times
+        splits = (rng.sample(range(len(pooled)), size) for _ in range(SAMPLES))
+        count = SAMPLES
+
+    # A small tolerance, so a split equal to the observed one counts.
+    extreme = sum(1 for indices in splits if difference(indices) >= observed - 1e-12)
+    return extreme / count
+
+
+def same_run(a: dict, b: dict) -> bool:
+    """Whether two results are one run, e.g. a run recorded and then checked."""
+    if a.get('revision') == b.get('revision') and a.get('date') == b.get('date'):
+        return True
+    times = {name: result['times'] for name, result in a['benchmarks'].items()}
+    return times == {name: result['times'] for name, result in b['benchmarks'].items()}
+
+
+def find_baseline(history: List[dict], results: dict, revision: Optional[str]) -> Optional[dict]:
+    for entry in reversed(history):
+        if not comparable(entry, results) or same_run(entry, results):
+            continue
+        if revision is None or (entry.get('revision') or '').startswith(revision):
+            return entry
+    return None
+
+
+def record(options) -> int:
+    results = read_results(options.results)
+    with open(options.history, 'a') as f:
+        f.write(json.dumps(results) + '\n')
+    print(f"recorded {options.results} in {options.history}")
+    return 0
+
+
+def check(options) -> int:
+    results = read_results(options.results)
+    baseline = find_baseline(read_history(options.history), results, options.baseline)
+    if baseline is None:
+        print("no comparable baseline in the history; nothing to compare with")
+        return 0
+
+    print(f"baseline {short(baseline.get('revision'))} ({baseline.get('date')}), "
+          f"current {short(results.get('revision'))}")
+    print(f"{'benchmark':10} {'baseline ms':>12} {'current ms':>11} {'change':>8} {'p':>7}  status")
+    regressions = 0
+    for name, current in results['benchmarks'].items():
+        before = baseline['benchmarks'].get(name)
+        if before is None:
+            print(f"{name:10} {'':>12} {current['median'] * 1000:>11.1f} {'':>8} {'':>7}  new")
+            continue
+        if before.get('source_sha256') != current.get('source_sha256'):
+            # The program was edited since the baseline; its times say
+            # nothing about the interpreter.
+            print(f"{name:10} {before['median'] * 1000:>12.1f} {current['median'] * 1000:>11.1f} "
+                  f"{'':>8} {'':>7}  changed, not compared")
+            continue
+        change = current['median'] / before['median'] - 1
+        p = slower_p_value(before['times'], current['times'])
+        if change > options.threshold and p < options.alpha:
+            status = 'REGRESSION'
+            regressions += 1
+        elif change > 0 and p < options.alpha:
+            status = 'slower'
+        elif change < 0 and slower_p_value(current['times'], before['times']) < options.alpha:
+            status = 'faster'
+        else:
+            status = 'ok'
+        print(f"{name:10} {before['median'] * 1000:>12.1f} {current['median'] * 1000:>11.1f} "
+              f"{change:>+8.1%} {p:>7.3f}  {status}")
+
+    if regressions:
+        print(f"{regressions} benchmark(s) more than {options.threshold:.0%} slower")
+        return 1
+    return 0
+
+
+def trend(options) -> int:
+    history = read_history(options.history)
+    machine = machine_fingerprint()
+    runs = [entry for entry in history
+            if entry.get('machine') == machine and entry.get('python') == options.python
+            and entry.get('backend') == options.backend]
+    runs = runs[-options.last:]
+    if not runs:
+        print(f"no {options.backend} runs from this machine with {options.python} in the history")
+        return 0
+
+    names = sorted({name for entry in runs for name in entry['benchmarks']})
+    print(f"{'revision':10} {'date':20} " + ' '.join(f"{name:>10}" for name in names))
+    for entry in runs:
+        cells = []
+        for name in names:
+            result = entry['benchmarks'].get(name)
+            cells.append(f"{result['median'] * 1000:>10.1f}" if result else f"{'-':>10}")
+        print(f"{short(entry.get('revision')):10} {entry.get('date', ''):20.20} " + ' '.join(cells))
+    print("(median ms per benchmark, oldest first)")
+    return 0
+
+
+def short(revision: Optional[str]) -> str:
+    return (revision or 'unknown')[:10]
+
+
+def current_python() -> str:
+    """This Python, as benchmarks/run.py records it."""
+    return f"{platform.python_implementation()} {platform.python_version()}"
+
+
+def percentage(text: str) -> float:
+    """
+    '5%' or '5' as 0.05. A bare number below 1 is rejected rather than
+    guessed at, since 0.05 could mean either 5% or 0.05%.
+    """
+    number = text[:-1] if text.endswith('%') else text
+    try:
+        value = float(number)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a percentage: {text!r}")
+    if number is text and 0 < value < 1:
+        raise argparse.ArgumentTypeError(
+            f"ambiguous percentage {text!r}; write {value:g}% or {value * 100:g}%")
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"negative percentage: {text!r}")
+    return value / 100
+
+
+def main(args) -> int:
+    arg_parser = argparse.ArgumentParser(prog='compare.py')
+    arg_parser.add_argument('--history', default=HISTORY, metavar='FILE',
+                            help="history file (default: benchmarks/history.jsonl)")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help="add a run to the history")
+    record_parser.add_argument('results', help="JSON written by benchmarks/run.py")
+    record_parser.set_defaults(run=record)
+
+    check_parser = commands.add_parser('check', help="compare a run with a baseline")
+    check_parser.add_argument('results', help="JSON written by benchmarks/run.py")
+    check_parser.add_argument('--baseline', metavar='REV',
+                              help="revision (or prefix) of the baseline run "
+                                   "(default: the latest comparable run)")
+    check_parser.add_argument('--threshold', type=percentage, default='5%', metavar='PCT',
+                              help="slowdown of the median that fails the check, "
+                                   "e.g. 5%% or 5 (default: %(default)s)")
+    check_parser.add_argument('--alpha', type=float, default=0.05,
+                              help="significance level (default: 0.05)")
+    check_parser.set_defaults(run=check)
+
+    trend_parser = commands.add_parser('trend', help="print medians across recent runs")
+    trend_parser.add_argument('--last', type=int, default=10, metavar='N')
+    trend_parser.add_argument('--backend', default='tree')
+    trend_parser.add_argument('--python', default=current_python(),
+                              help="runs made with this Python, as run.py records it "
+                                   "(default: %(default)s)")
+    trend_parser.set_defaults(run=trend)
+
+    options = arg_parser.parse_args(args)
+    return options.run(options)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
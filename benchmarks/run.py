@@ -0,0 +1,138 @@
+"""
+Runs the Lox programs in benchmarks/lox through Lox.run and reports, for
+each, the median and standard deviation of its run time and the
+operations per second that gives, as JSON.
+
+Each program starts with a `// ops: N` line saying how many operations
+(calls, loop iterations, ...) it performs, and prints a result, which
+has to be the same on every run. A run uses a fresh interpreter, with
+output kept in memory; the first --warmup runs aren't counted.
+
+Usage: python benchmarks/run.py [--backend B] [--warmup N] [--repeat N]
+                                [--output FILE] [benchmark ...]
+"""
+import argparse
+import datetime
+import glob
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SUITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lox')
+
+sys.path.insert(0, ROOT)
+
+import ErrorReporter  # noqa: E402
+import Lox  # noqa: E402
+from Output import MemorySink  # noqa: E402
+
+
+class Benchmark:
+    def __init__(self, path: str):
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        with open(path) as f:
+            self.source = f.read()
+        first = self.source.split('\n', 1)[0]
+        if not first.startswith('// ops:'):
+            raise ValueError(f"{path} doesn't start with an '// ops: N' line")
+        self.ops = int(first[len('// ops:'):])
+
+    def run(self, backend: str) -> str:
+        """Run the program once; its output."""
+        output = MemorySink()
+        Lox.interpreter = Lox.BACKENDS[backend](output=output)
+        Lox.run(self.source)
+        if ErrorReporter.hadError or ErrorReporter.hadRuntimeError:
+            raise RuntimeError(f"{self.name} failed")
+        return output.getvalue()
+
+
+def measure(benchmark: Benchmark, backend: str, warmup: int, repeat: int) -> dict:
+    expected = None
+    times = []
+    for i in range(warmup + repeat):
+        start = time.perf_counter()
+        output = benchmark.run(backend)
+        elapsed = time.perf_counter() - start
+        if expected is None:
+            expected = output
+        elif output != expected:
+            raise RuntimeError(f"{benchmark.name} printed {expected!r}, then {output!r}")
+        if i >= warmup:
+            times.append(elapsed)
+
+    median = statistics.median(times)
+    return {
+        'ops': benchmark.ops,
+        'median': median,
+        'stddev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'min': min(times),
+        'ops_per_sec': benchmark.ops / median,
+        'times': times,
+        'output': expected,
+        'source_sha256': hashlib.sha256(benchmark.source.encode()).hexdigest(),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args):
+    arg_parser = argparse.ArgumentParser(prog='run.py')
+    arg_parser.add_argument('benchmarks', nargs='*', metavar='benchmark',
+                            help="names of the programs to run (default: all)")
+    arg_parser.add_argument('--backend', choices=Lox.BACKENDS, default='tree')
+    arg_parser.add_argument('--warmup', type=int, default=1, metavar='N')
+    arg_parser.add_argument('--repeat', type=int, default=5, metavar='N')
+    arg_parser.add_argument('--output', metavar='FILE',
+                            help="write the JSON here instead of to stdout")
+    options = arg_parser.parse_args(args)
+    if options.repeat < 1 or options.warmup < 0:
+        arg_parser.error("--repeat must be at least 1 and --warmup at least 0")
+
+    suite = {benchmark.name: benchmark for benchmark in
+             map(Benchmark, sorted(glob.glob(os.path.join(SUITE, '*.lox'))))}
+    names = options.benchmarks or list(suite)
+    for name in names:
+        if name not in suite:
+            arg_parser.error(f"no benchmark {name!r}; there are: {', '.join(suite)}")
+
+    results = {}
+    for name in names:
+        results[name] = measure(suite[name], options.backend, options.warmup, options.repeat)
+        print(f"{name:10} {results[name]['median'] * 1000:9.1f} ms "
+              f"± {results[name]['stddev'] * 1000:6.1f}  "
+              f"{results[name]['ops_per_sec']:12,.0f} ops/s", file=sys.stderr)
+
+    report = {
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': f"{platform.python_implementation()} {platform.python_version()}",
+        'platform': platform.platform(),
+        'backend': options.backend,
+        'warmup': options.warmup,
+        'repeat': options.repeat,
+        'benchmarks': results,
+    }
+    if options.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(options.output, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])